@@ -0,0 +1,106 @@
+"""
+Benchmark comparing the serial and the parallel loading of the summary index from a directory of workout files saved as
+json, which is the situation when the application is started for the first time after upgrading. The same comparison
+can be made for workout files in the binary columnar format with "--format workout", where only the header of each file
+is read and parsing in parallel does not pay off.
+
+Run from the project directory with:
+    $ python -m benchmarks.bench_parallel_loading --workouts 5000
+    $ python -m benchmarks.bench_parallel_loading --workouts 5000 --format workout
+
+The speedup of the parallel mode depends on the amount of processors, so the processor count is printed with the
+results. On a machine with a single processor the parallel mode cannot be faster than the serial mode.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime
+
+from exercise_bike_logger import workout_file
+from exercise_bike_logger.workout_index import WorkoutIndex
+
+
+def create_workouts(directory, workouts, duration, file_format):
+    """
+    Creates synthetic workouts with the same structure as the json files saved by earlier versions of the application.
+
+    :param directory: The directory that the workout files are saved in.
+    :param workouts: The amount of workouts to create.
+    :param duration: The duration of each workout in seconds.
+    :param file_format: Either "json" for the json files of earlier versions or "workout" for the columnar format.
+    """
+    timestamps = [f"{second // 3600:02d}:{second % 3600 // 60:02d}:{second % 60:02d}"
+                  for second in range(1, duration + 1)]
+
+    for i in range(workouts):
+        unix_time = 1500000000 + i * 86400
+        speed = [round(random.uniform(10, 40), 1) for _ in range(duration)]
+        rpm = [random.randint(40, 110) for _ in range(duration)]
+        heart_rate = [random.randint(90, 180) for _ in range(duration)]
+        watt = [round(random.uniform(50, 300), 1) for _ in range(duration)]
+        distance = [round(second / 300, 1) for second in range(duration)]
+        calories = [second // 10 for second in range(duration)]
+
+        workout = {"date_time": datetime.fromtimestamp(unix_time).strftime("%d-%m-%Y %H:%M:%S"),
+                   "program_name": "Manual", "program_level": random.randint(1, 20), "duration": timestamps[-1],
+                   "total_distance": distance[-1], "total_calories": calories[-1],
+                   "avg_speed": round(sum(speed) / duration, 2), "avg_rpm": round(sum(rpm) / duration, 2),
+                   "avg_heart_rate": round(sum(heart_rate) / duration, 2), "avg_watt": round(sum(watt) / duration, 2),
+                   "max_speed": max(speed), "max_rpm": max(rpm), "max_heart_rate": max(heart_rate),
+                   "max_watt": max(watt), "time": timestamps, "speed": speed, "rpm": rpm, "distance": distance,
+                   "calories": calories, "heart_rate": heart_rate, "watt": watt, "level": [5] * duration}
+
+        if file_format == "workout":
+            workout_file.write_workout(f"{directory}/{unix_time}.workout", workout_file.upgrade_workout(workout))
+        else:
+            with open(f"{directory}/{unix_time}.json", "w") as jsonfile:
+                json.dump(workout, jsonfile)
+
+
+def time_index_rebuild(directory, parallel, repeats):
+    """Returns the best time of rebuilding the summary index from scratch and the resulting summaries."""
+    best = float("inf")
+    summaries = None
+    for _ in range(repeats):
+        index_path = f"{directory}/index.json"
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+        start = time.perf_counter()
+        summaries = WorkoutIndex(f"{directory}/workouts", index_path, parallel).load_summaries()
+        best = min(best, time.perf_counter() - start)
+
+    return best, summaries
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--workouts", type=int, default=5000, help="the amount of synthetic workouts")
+    argument_parser.add_argument("--duration", type=int, default=1200, help="the duration of each workout in seconds")
+    argument_parser.add_argument("--repeats", type=int, default=3, help="the amount of times each mode is timed")
+    argument_parser.add_argument("--format", choices=["json", "workout"], default="json",
+                                 help="the format that the workout files are saved in")
+    arguments = argument_parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.mkdir(f"{directory}/workouts")
+        create_workouts(f"{directory}/workouts", arguments.workouts, arguments.duration, arguments.format)
+
+        serial_time, serial_summaries = time_index_rebuild(directory, False, arguments.repeats)
+        parallel_time, parallel_summaries = time_index_rebuild(directory, True, arguments.repeats)
+
+        # The modification times are the same in both modes, so the summaries should be identical.
+        assert serial_summaries == parallel_summaries
+
+        print(f"Workouts: {arguments.workouts} {arguments.format} files ({arguments.duration} seconds each), "
+              f"processors: {os.cpu_count()}")
+        print(f"Serial:   {serial_time:.2f} s")
+        print(f"Parallel: {parallel_time:.2f} s")
+        print(f"Speedup:  {serial_time / parallel_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
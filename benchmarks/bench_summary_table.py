@@ -0,0 +1,237 @@
+"""
+Benchmark comparing the summary table with the code it replaces, which is the processing of the workout list done by
+the statistics tab of earlier versions of the application: the totals and records computed by process_workouts() and
+the yearly and monthly totals of the interactive graph computed by get_interactive_graph_data(). The code of earlier
+versions is copied into the OriginalStatistics class below, and is given summaries in the format it used, where the
+duration is a timestamp with the format "HH:MM:SS".
+
+Run from the project directory with:
+    $ python -m benchmarks.bench_summary_table --workouts 1000 10000 100000
+"""
+import argparse
+import datetime
+import random
+import time
+
+from dateutil import parser
+
+from exercise_bike_logger.record_book import RECORDS
+from exercise_bike_logger.summary_table import SummaryTable
+from exercise_bike_logger.workout_file import seconds_to_timestamp
+
+
+def create_summaries(workouts):
+    """Creates synthetic workout summaries, one workout per day, with the most recent first."""
+    summaries = []
+    for i in range(workouts):
+        unix_time = 1000000000 + i * 86400
+        summaries.append({"id": str(unix_time), "unix_time": unix_time,
+                          "date_time": datetime.datetime.fromtimestamp(unix_time).strftime("%d-%m-%Y %H:%M:%S"),
+                          "program_name": random.choice(["Program 1", "Program 2", "Program 3"]),
+                          "program_level": random.randint(1, 20), "duration": random.randint(600, 3600),
+                          "total_distance": round(random.uniform(5, 30), 1), "total_calories": random.randint(50, 800),
+                          "avg_speed": round(random.uniform(10, 40), 2), "avg_rpm": round(random.uniform(40, 110), 2),
+                          "avg_heart_rate": round(random.uniform(90, 180), 2),
+                          "avg_watt": round(random.uniform(50, 300), 2), "max_speed": round(random.uniform(10, 60), 1),
+                          "max_rpm": random.randint(40, 150), "max_heart_rate": random.randint(90, 200),
+                          "max_watt": round(random.uniform(50, 500), 1)})
+    summaries.reverse()
+
+    return summaries
+
+
+class OriginalStatistics:
+    """
+    The processing of the workout list done by the statistics tab of earlier versions of the application, where the
+    workout list model held a dictionary for each workout. The methods are copied without changes, except that the
+    workouts are given to process_workouts() instead of being read from the model and that the day layer of the
+    interactive graph, which is not part of the benchmark, is left out of get_interactive_graph_data().
+    """
+    def __init__(self):
+        self.statistics = {}
+
+    @staticmethod
+    def timestamp_to_seconds(timestamp):
+        """Converts a timestamp with the format "HH:MM:SS" into the equivalent amount of seconds. """
+        # Adding the seconds from the timestamp.
+        seconds = int(timestamp[6:])
+        # Adding the minutes from the timestamp in seconds.
+        seconds += int(timestamp[3:5]) * 60
+        # Adding the hours from the timestamp in seconds.
+        seconds += int(timestamp[:2]) * 3600
+
+        return seconds
+
+    def process_workouts(self, workouts):
+        """Processes the internal workout list model to extract the needed statistics so they can be displayed."""
+        # Calculating each statistic one by one using the data, starting with the total amount of workouts.
+        self.statistics["total_workouts"] = len(workouts)
+
+        # Getting the total time in seconds and converting it to the format "DD day(s), HH:MM:SS".
+        seconds = [self.timestamp_to_seconds(workout["duration"]) for workout in workouts]
+        self.statistics["total_time"] = str(datetime.timedelta(seconds=sum(seconds)))
+
+        self.statistics["total_distance"] = str(round(sum([workout["total_distance"] for workout in workouts]), 1))
+        self.statistics["total_calories"] = str(sum([workout["total_calories"] for workout in workouts]))
+
+        longest_workout = workouts[seconds.index(max(seconds))]
+        self.statistics["longest_workout"] = (str(longest_workout["duration"]), longest_workout["date_time"])
+
+        self.statistics["longest_distance"] = self.get_max_value_date(workouts, "total_distance")
+        self.statistics["most_calories_burned"] = self.get_max_value_date(workouts, "total_calories")
+        self.statistics["highest_average_speed"] = self.get_max_value_date(workouts, "avg_speed")
+        self.statistics["highest_average_rpm"] = self.get_max_value_date(workouts, "avg_rpm")
+        self.statistics["highest_average_heart_rate"] = self.get_max_value_date(workouts, "avg_heart_rate")
+        self.statistics["highest_average_watt"] = self.get_max_value_date(workouts, "avg_watt")
+        self.statistics["highest_speed"] = self.get_max_value_date(workouts, "max_speed")
+        self.statistics["highest_rpm"] = self.get_max_value_date(workouts, "max_rpm")
+        self.statistics["highest_heart_rate"] = self.get_max_value_date(workouts, "max_heart_rate")
+        self.statistics["highest_watt"] = self.get_max_value_date(workouts, "max_watt")
+
+    @staticmethod
+    def get_max_value_date(workouts, key):
+        """
+        Finds the index of the workout with the maximum value for the given key.
+
+        :param workouts: A list of dictionaries where each dictionary represents a workout.
+        :param key: The specific attribute that we search for the maximum value for.
+        :return: The maximum value and the date of the workout with the maximum value.
+        """
+        # Extracting the specific data from each workout in the workout list model.
+        key_list = [workout[key] for workout in workouts]
+
+        max_index = key_list.index(max(key_list))
+
+        return str(workouts[max_index][key]), workouts[max_index]["date_time"]
+
+    def get_interactive_graph_data(self, workouts, search_keys):
+        """
+        Goes through the workouts and extracts the data that will be used in the interactive graph. The search keys are
+        used to find the data specific to the current configuration of the interactive graph.
+
+        :param workouts: A list of dictionaries where each dictionary represents a workout.
+        :param search_keys: The list of keys used to specify the current "layer" of the interactive graph. For example,
+        search_keys = [2019, 8] means that we should return the daily data for august 2019.
+        :return: A dictionary where each key is a time frame and the value is the totals within that time frame.
+        For example, {2018: totals_2018, 2019: totals_2019, 2020: totals_2020}.
+        """
+        # Reversing the list of workouts so they are to the data in chronological order.
+        workouts = workouts[::-1]
+
+        data = {}
+
+        # If there are no search keys then we are on the year layer of the interactive graph.
+        if len(search_keys) == 0:
+            for workout in workouts:
+                date_time = parser.parse(workout["date_time"], dayfirst=True)
+
+                # Creating a new data dict if the key does not exist meaning that it's the first workout of the year.
+                data[date_time.year] = data.get(date_time.year,
+                                                {"workouts": 0, "time": 0, "distance": 0, "calories": 0})
+
+                # Adding the data from the workout to the total data for this year.
+                self.add_data_to_totals(workout, data, date_time.year)
+
+        # If there is one search key then we are on the month layer of the interactive graph.
+        if len(search_keys) == 1:
+            # Setting up the dictionary by creating a key-value pair for each month.
+            for month in ["January", "February", "March", "April", "May", "June", "July", "August", "September",
+                          "October", "November", "December"]:
+                data[month] = {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
+
+            # Going through the workouts and adding the data to the totals if the year matches the search key.
+            for workout in workouts:
+                date_time = parser.parse(workout["date_time"], dayfirst=True)
+
+                if date_time.year == int(search_keys[0]):
+                    # Adding the data from the workout to the total data for this month.
+                    self.add_data_to_totals(workout, data, date_time.strftime("%B"))
+
+        return data
+
+    def add_data_to_totals(self, workout, dictionary, key):
+        """Helper method used to add the data from the workout to the totals for the key of the dictionary."""
+        dictionary[key]["workouts"] += 1
+        dictionary[key]["time"] += self.timestamp_to_seconds(workout["duration"]) / 60
+        dictionary[key]["distance"] += workout["total_distance"]
+        dictionary[key]["calories"] += workout["total_calories"]
+
+
+def original_statistics(workouts, year):
+    """
+    Computes the statistics, the year layer and the month layer of the given year with the code of earlier versions.
+
+    :return: A tuple with the format (total workouts, dates of the records, workouts of each year, workouts of each
+    month of the year).
+    """
+    original = OriginalStatistics()
+    original.process_workouts(workouts)
+    years = original.get_interactive_graph_data(workouts, [])
+    months = original.get_interactive_graph_data(workouts, [str(year)])
+
+    records = {record: original.statistics[record][1] for record in RECORDS}
+
+    return (original.statistics["total_workouts"], records, {key: value["workouts"] for key, value in years.items()},
+            [value["workouts"] for value in months.values()])
+
+
+def table_statistics(table, year):
+    """
+    Computes the same statistics as original_statistics() with vectorised operations on the summary table. The month
+    layer is found from the totals of every month, which is what the rollup of the statistics tab is built from.
+    """
+    totals = table.totals()
+    records = {record: table.date_times[table.top(key, 1)[0]] for record, key in RECORDS.items()}
+
+    year_keys, year_totals = table.group_totals("year")
+    month_keys, month_totals = table.group_totals("month")
+
+    months = [0] * 12
+    for key, workouts in zip(month_keys.tolist(), month_totals["workouts"].tolist()):
+        if key // 100 == year:
+            months[key % 100 - 1] = workouts
+
+    return (totals["workouts"], records, dict(zip(year_keys.tolist(), year_totals["workouts"].tolist())), months)
+
+
+def best_time(function, repeats):
+    """Returns the best time of calling the function and the result of the function."""
+    best = float("inf")
+    result = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+
+    return best, result
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    argument_parser.add_argument("--workouts", type=int, nargs="+", default=[1000, 10000, 100000],
+                                 help="the amounts of synthetic workouts")
+    argument_parser.add_argument("--repeats", type=int, default=3, help="the amount of times each mode is timed")
+    arguments = argument_parser.parse_args()
+
+    print(f"{'Workouts':>10} {'Original':>12} {'Table build':>12} {'Table':>10} {'Speedup':>8}")
+    for workouts in arguments.workouts:
+        summaries = create_summaries(workouts)
+        year = time.localtime(summaries[len(summaries) // 2]["unix_time"]).tm_year
+
+        # Earlier versions saved the duration as a timestamp with the format "HH:MM:SS".
+        original_summaries = [dict(summary, duration=seconds_to_timestamp(summary["duration"]))
+                              for summary in summaries]
+
+        original_time, original_result = best_time(lambda: original_statistics(original_summaries, year),
+                                                   arguments.repeats)
+        build_time, table = best_time(lambda: SummaryTable(summaries), arguments.repeats)
+        table_time, table_result = best_time(lambda: table_statistics(table, year), arguments.repeats)
+
+        assert original_result == table_result
+
+        print(f"{workouts:>10} {original_time * 1000:>9.1f} ms {build_time * 1000:>9.1f} ms "
+              f"{table_time * 1000:>7.2f} ms {original_time / table_time:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -115,8 +115,11 @@ class BluetoothSession:
         await self.client.stop_notify(self.characteristic_uuid)
 
         # Processing the entire workout session to extract and save the data if the workout was stopped due to time.
+        # Otherwise the session log is deleted since the data from a session that was stopped prematurely is not saved.
         if not self.stop_flag:
             self.workout_session.process_workout_session()
+        else:
+            self.workout_session.discard_log()
 
     def notification_handler(self, sender, data):
         """Handling the notifications that are received from a characteristic."""
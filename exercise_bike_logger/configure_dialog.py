@@ -23,6 +23,16 @@ class ConfigureDialog(QtWidgets.QDialog):
         self.workout_window = None
         self.program = None
 
+        # Styling the graph and creating the line that shows the workout program, which is updated with the data of
+        # the chosen program every time an option is changed.
+        self.graphWidget.setBackground("#31363b")
+        self.program_line = self.graphWidget.plot([], [], pen=pg.mkPen(color="#4b6bc8", width=3))
+
+        # The previous best workout with the chosen program and level is looked up by the statistics jobs, which run in
+        # a worker thread, and shown when the result is ready.
+        self.jobs = self.main_window.statistics_tab.jobs
+        self.jobs.finished.connect(self.on_job_finished)
+
         # Plotting the initial workout program.
         self.plot_program()
 
@@ -42,11 +52,52 @@ class ConfigureDialog(QtWidgets.QDialog):
         """Plotting the workout program in the graphWidget to visualize the program for the user."""
         self.program = WorkoutProgram(self.levelSpinBox.value(), self.timeSpinBox.value(),
                                       self.programComboBox.currentText())
-        self.graphWidget.clear()
-
-        self.graphWidget.setBackground("#31363b")
 
         # Performing cosmetic changes to the coordinate lists to make the visualization clearer.
         x, y = self.program.prettify_line()
 
-        self.graphWidget.plot(x, y, pen=pg.mkPen(color="#4b6bc8", width=3))
+        self.program_line.setData(x, y)
+
+        self.request_previous_best()
+
+    def showEvent(self, event):
+        """Requests the previous best workout every time the dialog is shown, since new workouts might be finished."""
+        self.request_previous_best()
+
+        super(ConfigureDialog, self).showEvent(event)
+
+    def request_previous_best(self):
+        """Requests the previous best workout with the chosen program and level from the statistics jobs."""
+        # The previous best workout is looked up when the workout history is loaded.
+        if self.jobs.history_version == 0:
+            self.previousBestLabel.setText("")
+            return
+
+        program_name, program_level = self.program.program_name, self.program.level
+        self.jobs.request("previous best", (program_name, program_level), self.compute_previous_best, program_name,
+                          program_level)
+
+    def compute_previous_best(self, program_name, program_level):
+        """
+        Finds the workout with the highest average watt and the amount of workouts with the given program and level
+        using the indexed queries of the storage backend. This is run in the worker thread of the statistics jobs.
+
+        :return: A tuple with the format (summary of the best workout or None, amount of workouts).
+        """
+        store = self.main_window.store
+        best = store.max_values("avg_watt", 1, program_name=program_name, program_level=program_level)
+        totals = store.totals(program_name, program_level)
+
+        return (best[0] if best else None), totals["workouts"]
+
+    def on_job_finished(self, name, result):
+        """Shows the previous best workout when it is found. This is run in the GUI thread."""
+        if name != "previous best":
+            return
+
+        best, workouts = result
+        if best is None:
+            self.previousBestLabel.setText("No previous workouts with this program and level.")
+        else:
+            self.previousBestLabel.setText(f"Previous best: {best['avg_watt']} average watt on {best['date_time']} "
+                                           f"({workouts} workouts with this program and level).")
@@ -0,0 +1,158 @@
+"""
+Module containing the mean-maximal curves of the workout history. The mean-maximal curve of a data series contains the
+best average of the series over each window length, for example the highest average watt sustained for 5 seconds, 1
+minute and 20 minutes. The curves are computed with prefix sums, cached for each workout and combined into an all-time
+envelope containing the best effort of the entire workout history for each window length.
+"""
+import threading
+
+import numpy as np
+
+# The data series that mean-maximal curves are computed for.
+CURVE_KEYS = ["watt", "rpm", "speed"]
+
+# The window lengths in seconds that the curves contain. The windows are spaced geometrically from 5 seconds to about 4
+# hours, with every 5 seconds up to a minute, since the short efforts change the most between window lengths.
+CURVE_WINDOWS = np.unique(np.concatenate([np.arange(5, 61, 5),
+                                          np.round(60 * 1.1 ** np.arange(0, 59)).astype(np.int64)]))
+
+# The version of the saved curves. If the saved curves have a different version they are computed again.
+CURVES_VERSION = 1
+
+
+def mean_maximal_curve(series, windows=CURVE_WINDOWS):
+    """
+    Computes the mean-maximal curve of a data series. With a prefix sum the sum of any window is the difference of two
+    elements, so each window length is a single vectorised pass over the series.
+
+    :param series: The data series with an element for each second of the workout.
+    :param windows: The window lengths in seconds.
+    :return: A numpy array with the best average of the series for each window length. Windows that are longer than the
+    series are NaN.
+    """
+    series = np.asarray(series, dtype=np.float64)
+    prefix_sums = np.concatenate([[0.0], np.cumsum(series)])
+
+    curve = np.full(len(windows), np.nan)
+    for i, window in enumerate(windows):
+        if window > len(series):
+            break
+
+        curve[i] = np.max(prefix_sums[window:] - prefix_sums[:-window]) / window
+
+    return curve
+
+
+class EffortCurveCache:
+    """
+    This class maintains the mean-maximal curves of every workout in the workout history. The curves of a workout are
+    only computed once and saved in a cache file together with the summary hash of the workout, meaning that only new
+    or changed workouts need to be processed when the workout history is loaded. The cache is shared between the worker
+    threads and the GUI thread, so access is serialized with a lock.
+    """
+    def __init__(self, cache_path="../data/effort_curves.npz"):
+        """
+        Method called when an EffortCurveCache object is initialized.
+
+        :param cache_path: The path of the file in which the curves are saved.
+        """
+        self.cache_path = cache_path
+        self.lock = threading.Lock()
+
+        # List with the id of each workout in the cache, where the index is the row of the workout in the curves.
+        self.workout_ids = []
+
+        # List with the summary hash of each workout in the cache when its curves were computed, in the same order.
+        self.hashes = []
+
+        # Dictionary with a two-dimensional array for each key in CURVE_KEYS, with a row for each workout.
+        self.curves = {key: np.empty((0, len(CURVE_WINDOWS))) for key in CURVE_KEYS}
+
+    def update(self, store, hashes):
+        """
+        Updates the cache so it contains the curves of exactly the given workouts. The curves of workouts that are not
+        in the cache or whose summary hash has changed are computed and the curves of workouts that no longer exist are
+        removed.
+
+        :param store: The storage backend that the data series of the new workouts are loaded from.
+        :param hashes: A dictionary with the summary hash of each workout in the workout history, with the workout id as
+        the key.
+        """
+        with self.lock:
+            if not self.workout_ids:
+                self.__read_cache()
+
+            # Removing the workouts that no longer exist or have changed since their curves were computed.
+            rows = [row for row, (workout_id, hash_value) in enumerate(zip(self.workout_ids, self.hashes))
+                    if hashes.get(workout_id) == hash_value]
+            changed = len(rows) != len(self.workout_ids)
+            self.workout_ids = [self.workout_ids[row] for row in rows]
+            self.hashes = [self.hashes[row] for row in rows]
+            self.curves = {key: curves[rows] for key, curves in self.curves.items()}
+
+            # Computing the curves of the new workouts in chronological order.
+            cached = set(self.workout_ids)
+            new_ids = [workout_id for workout_id in sorted(hashes, key=int) if workout_id not in cached]
+            if new_ids:
+                self.__add_curves(new_ids, [hashes[workout_id] for workout_id in new_ids],
+                                  [self.__workout_curves(store.load_workout(workout_id)) for workout_id in new_ids])
+                changed = True
+
+            if changed:
+                self.__save()
+
+    def envelope(self, key):
+        """
+        Returns the all-time envelope of the mean-maximal curves of the given data series.
+
+        :param key: The data series, which is one of the keys in CURVE_KEYS.
+        :return: A tuple with the format (values, workout ids) where values is an array with the best average for each
+        window length and workout ids is a list with the id of the workout with the best average, or None if no workout
+        is long enough.
+        """
+        with self.lock:
+            curves = self.curves[key]
+            if len(curves) == 0:
+                return np.full(len(CURVE_WINDOWS), np.nan), [None] * len(CURVE_WINDOWS)
+
+            # Replacing NaN with -inf so the windows that a workout is too short for are never the best.
+            filled = np.where(np.isnan(curves), -np.inf, curves)
+            rows = np.argmax(filled, axis=0)
+            values = filled[rows, np.arange(len(CURVE_WINDOWS))]
+
+            workout_ids = [self.workout_ids[row] if np.isfinite(value) else None for row, value in zip(rows, values)]
+
+            return np.where(np.isfinite(values), values, np.nan), workout_ids
+
+    def __add_curves(self, workout_ids, hashes, workout_curves):
+        """Helper method used to append the curves of the given workouts and their summary hashes to the cache."""
+        self.workout_ids.extend(workout_ids)
+        self.hashes.extend(hashes)
+        for key in CURVE_KEYS:
+            self.curves[key] = np.vstack([self.curves[key]] + [curves[key] for curves in workout_curves])
+
+    @staticmethod
+    def __workout_curves(workout):
+        """Helper method used to compute the mean-maximal curve of each data series in CURVE_KEYS of the workout."""
+        return {key: mean_maximal_curve(workout[key]) for key in CURVE_KEYS}
+
+    def __read_cache(self):
+        """Reads the cached curves from the cache file if it exists and was saved with the same windows."""
+        try:
+            with np.load(self.cache_path) as cache:
+                if int(cache["version"]) != CURVES_VERSION or not np.array_equal(cache["windows"], CURVE_WINDOWS):
+                    return
+
+                self.workout_ids = [str(workout_id) for workout_id in cache["workout_ids"]]
+                self.hashes = [int(hash_value) for hash_value in cache["hashes"]]
+                self.curves = {key: cache[key] for key in CURVE_KEYS}
+        except (OSError, ValueError, KeyError):
+            return
+
+    def __save(self):
+        """Saves the cached curves to the cache file."""
+        with open(self.cache_path, "wb") as cache_file:
+            np.savez(cache_file, version=CURVES_VERSION, windows=CURVE_WINDOWS,
+                     workout_ids=np.array([int(workout_id) for workout_id in self.workout_ids], dtype=np.int64),
+                     hashes=np.array(self.hashes, dtype=np.int64),
+                     **self.curves)
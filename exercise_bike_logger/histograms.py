@@ -0,0 +1,123 @@
+"""
+Module containing the fixed-bin histograms of the data series of the workouts. A histogram counts the seconds of a
+workout where the value of a data series was within each bin, meaning that histograms can be merged by adding the
+counts. The histograms are built while a workout is ongoing and saved with the workout, so percentiles and the time
+spent within each range can be found for a workout or a period without loading the data series.
+
+The histograms are saved as lists of counts without the trailing empty bins, so the lists can have different lengths.
+"""
+import numpy as np
+
+# The data series that histograms are built for and the bins of each histogram as (bin width, amount of bins). Values
+# above the last bin are counted in the last bin.
+HISTOGRAM_BINS = {"speed": (1.0, 100), "rpm": (5, 40), "heart_rate": (5, 50), "watt": (10, 100)}
+
+
+def empty_histograms():
+    """Returns a dictionary with an empty histogram for each data series in HISTOGRAM_BINS."""
+    return {key: [] for key in HISTOGRAM_BINS}
+
+
+def add_value(histograms, key, value):
+    """
+    Counts a single second with the given value in the histogram of the data series.
+
+    :param histograms: A dictionary with a histogram for each data series. This is modified in place.
+    :param key: The data series, which is one of the keys in HISTOGRAM_BINS.
+    :param value: The value of the data series.
+    """
+    width, bins = HISTOGRAM_BINS[key]
+    index = min(max(int(value // width), 0), bins - 1)
+
+    counts = histograms[key]
+    if index >= len(counts):
+        counts.extend([0] * (index + 1 - len(counts)))
+    counts[index] += 1
+
+
+def histograms_from_series(workout):
+    """
+    Builds the histograms of a complete workout from the data series. This is used for workouts saved by earlier
+    versions of the application, which do not contain histograms.
+
+    :param workout: A dictionary containing the data series of the workout.
+    :return: A dictionary with a histogram for each data series in HISTOGRAM_BINS.
+    """
+    histograms = {}
+    for key, (width, bins) in HISTOGRAM_BINS.items():
+        indices = np.clip(np.asarray(workout[key], dtype=np.float64) // width, 0, bins - 1).astype(np.int64)
+        histograms[key] = np.trim_zeros(np.bincount(indices, minlength=1), "b").tolist()
+
+    return histograms
+
+
+def merge_histograms(target, source, sign=1):
+    """
+    Adds (sign = 1) or subtracts (sign = -1) the counts of the source histograms to the target histograms.
+
+    :param target: A dictionary with a histogram for each data series. This is modified in place.
+    :param source: A dictionary with a histogram for each data series.
+    :param sign: 1 to add the counts and -1 to subtract the counts.
+    """
+    for key, counts in source.items():
+        target_counts = target.setdefault(key, [])
+        if len(counts) > len(target_counts):
+            target_counts.extend([0] * (len(counts) - len(target_counts)))
+
+        for i, count in enumerate(counts):
+            target_counts[i] += sign * count
+
+        # Removing the trailing empty bins so the histogram is the same as if the source was never added.
+        while target_counts and target_counts[-1] == 0:
+            target_counts.pop()
+
+
+def percentiles(histograms, key, quantiles=(0.5, 0.9, 0.99)):
+    """
+    Returns the given quantiles of the data series, interpolated linearly within the bins.
+
+    :param histograms: A dictionary with a histogram for each data series.
+    :param key: The data series, which is one of the keys in HISTOGRAM_BINS.
+    :param quantiles: The quantiles between 0 and 1.
+    :return: A list with the value of each quantile, or None for each quantile if the histogram is empty.
+    """
+    width = HISTOGRAM_BINS[key][0]
+    counts = np.asarray(histograms.get(key, []), dtype=np.float64)
+    total = counts.sum()
+    if total == 0:
+        return [None] * len(quantiles)
+
+    cumulative = np.cumsum(counts)
+
+    values = []
+    for quantile in quantiles:
+        index = int(np.searchsorted(cumulative, quantile * total))
+        index = min(index, len(counts) - 1)
+        before = cumulative[index - 1] if index > 0 else 0
+        fraction = (quantile * total - before) / counts[index] if counts[index] else 0
+        values.append(round(float((index + fraction) * width), 1))
+
+    return values
+
+
+def time_in_ranges(histograms, key, range_width):
+    """
+    Returns the seconds spent within each range of the data series, where the ranges are wider than the bins, for
+    example the time spent within each 50 watt range.
+
+    :param histograms: A dictionary with a histogram for each data series.
+    :param key: The data series, which is one of the keys in HISTOGRAM_BINS.
+    :param range_width: The width of each range, which must be a multiple of the bin width.
+    :return: A list of tuples with the format (start of range, seconds) for each range containing at least one second.
+    """
+    width = HISTOGRAM_BINS[key][0]
+    bins_per_range = int(round(range_width / width))
+    counts = histograms.get(key, [])
+
+    ranges = []
+    for start in range(0, len(counts), bins_per_range):
+        seconds = sum(counts[start:start + bins_per_range])
+        if seconds != 0:
+            ranges.append((start * width, seconds))
+
+    return ranges
@@ -0,0 +1,37 @@
+from PyQt5 import QtCore
+
+from exercise_bike_logger.worker import Worker
+
+
+class HistoryLoader(QtCore.QObject):
+    """
+    Class that loads the workout history from the storage backend in a worker thread, so the main window is responsive
+    while the workout history is loading. The sorted index of the workout history is sent to the GUI thread as soon as
+    it is loaded, after which the workout list fetches the summaries it needs a page at a time. Since the signals are
+    emitted from the worker thread, the connected slots are run in the GUI thread.
+    """
+    # Signal emitted with the list of workout ids, the most recent first, when the sorted index is loaded.
+    ids_loaded = QtCore.pyqtSignal(list)
+
+    # Signal emitted when the entire workout history is loaded.
+    finished = QtCore.pyqtSignal()
+
+    def __init__(self, store):
+        """
+        Method called when the history loader is initialized.
+
+        :param store: The storage backend that the workout history is loaded from.
+        """
+        super(HistoryLoader, self).__init__()
+
+        self.store = store
+
+    def start(self, threadpool):
+        """Starts loading the workout history using a worker from the given thread pool."""
+        threadpool.start(Worker(self.run))
+
+    def run(self):
+        """Loading the sorted index of the workout history and emitting it. This is run in the worker thread."""
+        self.ids_loaded.emit(self.store.list_ids())
+
+        self.finished.emit()
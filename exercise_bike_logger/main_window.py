@@ -1,8 +1,12 @@
 from pathlib import Path
 
-from PyQt5 import QtWidgets, uic, QtCore
+from PyQt5 import QtCore, QtWidgets, uic
+from PyQt5.QtCore import QThreadPool
 
 from exercise_bike_logger.settings import Settings
+from exercise_bike_logger.workout_store import create_store
+from exercise_bike_logger.history_loader import HistoryLoader
+from exercise_bike_logger.workout_session import recover_sessions
 from exercise_bike_logger.workout_list_model import WorkoutListModel
 from exercise_bike_logger.workout_history_tab import WorkoutHistoryTab
 from exercise_bike_logger.statistics_tab import StatisticsTab
@@ -11,6 +15,10 @@ from exercise_bike_logger.configure_dialog import ConfigureDialog
 
 
 class MainWindow(QtWidgets.QMainWindow):
+    # Signal emitted with the summary of a new workout when it is saved. The workout is saved in the thread of the
+    # bluetooth session, so the signal is used to add the workout to the tabs in the GUI thread.
+    workout_saved = QtCore.pyqtSignal(dict)
+
     def __init__(self, *args, **kwargs):
         super(MainWindow, self).__init__(*args, **kwargs)
 
@@ -24,15 +32,29 @@ class MainWindow(QtWidgets.QMainWindow):
         if self.settings.address == "" or self.settings.characteristic_uuid == "":
             self.newWorkoutButton.setEnabled(False)
 
-        # Setting up the model that handles the workout list view.
-        self.model = WorkoutListModel()
-        self.model.load_workouts()
+        # Setting up the storage backend chosen in the settings and the model that handles the workout list view.
+        self.store = create_store(self.settings.storage_backend, self.settings.parallel_loading)
+
+        # Saving the workouts of sessions that were not finished, for example because the application crashed, before
+        # the workout history is loaded.
+        recover_sessions(self.store)
+        self.model = WorkoutListModel(self.store)
         self.workoutListView.setModel(self.model)
 
         # Setting up the two tabs on the main window.
         self.workout_history_tab = WorkoutHistoryTab(self)
         self.statistics_tab = StatisticsTab(self)
 
+        # Loading the workout history in the background so the window is responsive immediately. The workout list
+        # fetches the workouts it needs when the history is loaded, after which the statistics are computed.
+        self.threadpool = QThreadPool()
+        self.history_loader = HistoryLoader(self.store)
+        self.history_loader.ids_loaded.connect(self.model.set_workout_ids)
+        self.history_loader.finished.connect(self.statistics_tab.load_statistics)
+        self.history_loader.start(self.threadpool)
+
+        self.workout_saved.connect(self.add_workout)
+
         # Connecting the buttons with their respective functionality.
         self.configure_dialog = ConfigureDialog(self)
         self.newWorkoutButton.clicked.connect(self.configure_dialog.show)
@@ -40,39 +62,28 @@ class MainWindow(QtWidgets.QMainWindow):
         self.connect_dialog = ConnectDialog(self)
         self.connectButton.clicked.connect(self.connect_dialog.show)
 
-    def update_window(self):
+    def add_workout(self, workout):
         """
-        Updates the workout history tab and the statistics tab with the current data. This should be called when a
-        new workout is finished.
-        """
-        # Updating the workout list view on the workout history tab.
-        self.model.beginInsertRows(QtCore.QModelIndex(), 0, 0)
-        self.model.load_workouts()
-        self.model.endInsertRows()
+        Adds a new workout to the workout history tab and the statistics tab. This should be called when a new workout
+        is finished, which is done by emitting the workout_saved signal so it is run in the GUI thread.
 
-        # Updating the display on the statistics tab with the current data.
-        self.statistics_tab.process_workouts()
-        self.statistics_tab.update_display()
+        :param workout: A dictionary containing the summary of the new workout.
+        """
+        # Inserting the new workout at the top of the workout list view on the workout history tab.
+        self.model.add_workout(workout)
 
-        # Updating the interactive graph with the current data.
-        self.statistics_tab.interactive_data = self.statistics_tab.get_interactive_graph_data(
-            self.model.workouts, self.statistics_tab.search_keys)
-        self.statistics_tab.update_graph()
+        # Updating the statistics tab with the data from the new workout.
+        self.statistics_tab.add_workout(workout)
 
-    @staticmethod
-    def timestamp_to_seconds(timestamp):
-        """Converts a timestamp with the format "HH:MM:SS" into the equivalent amount of seconds. """
-        # Adding the seconds from the timestamp.
-        seconds = int(timestamp[6:])
-        # Adding the minutes from the timestamp in seconds.
-        seconds += int(timestamp[3:5]) * 60
-        # Adding the hours from the timestamp in seconds.
-        seconds += int(timestamp[:2]) * 3600
+    def closeEvent(self, event):
+        """Releases the resources held by the storage backend, such as the memory-mapped workouts, before closing."""
+        self.store.close()
 
-        return seconds
+        super(MainWindow, self).closeEvent(event)
 
     @staticmethod
     def __create_storage_setup():
         """Creates the needed storage setup if it does not already exist."""
-        # Creating the "data/workouts" directories if they do not already exist.
+        # Creating the "data/workouts" and "data/sessions" directories if they do not already exist.
         Path("../data/workouts").mkdir(parents=True, exist_ok=True)
+        Path("../data/sessions").mkdir(parents=True, exist_ok=True)
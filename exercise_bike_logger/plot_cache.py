@@ -0,0 +1,69 @@
+"""
+Module containing the cache of the arrays that are plotted in the workout history tab. The arrays of a workout are
+created once, when the workout is first shown, so changing the plotted data series or going back to a recently shown
+workout does not load or convert the data series again.
+"""
+from collections import OrderedDict
+
+import numpy as np
+
+from exercise_bike_logger.plot_lod import min_max_pyramid
+from exercise_bike_logger.workout_file import SERIES_KEYS
+
+
+class PlotArrayCache:
+    """
+    This class is a least recently used cache of the plot arrays of the workouts, with the workout id as the key. The
+    plot arrays of a workout are the elapsed minutes, which are used as the x-coordinates, a copy of each data series
+    and the level-of-detail pyramid of each data series. The arrays are copies so they stay valid after the memory map
+    of the workout file is closed. When the arrays use more memory than the budget the least recently used workouts are
+    removed.
+    """
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        """
+        Method called when a PlotArrayCache object is initialized.
+
+        :param max_bytes: The maximum amount of memory in bytes used by the cached arrays.
+        """
+        self.max_bytes = max_bytes
+
+        # Ordered dictionary with the plot arrays of each cached workout, the least recently used first.
+        self.workouts = OrderedDict()
+        self.size = 0
+
+    def get(self, workout_id, load_workout):
+        """
+        Returns the plot arrays of the workout with the given id, creating them if the workout is not cached.
+
+        :param workout_id: The id of the workout.
+        :param load_workout: A function without arguments that loads the complete workout, which is only called if the
+        workout is not cached.
+        :return: A dictionary with the elapsed minutes as "minutes", an array for each data series and a dictionary with
+        the level-of-detail pyramid of each data series as "pyramids".
+        """
+        if workout_id in self.workouts:
+            self.workouts.move_to_end(workout_id)
+            return self.workouts[workout_id]
+
+        workout = load_workout()
+        arrays = {key: np.array(workout[key]) for key in SERIES_KEYS}
+        arrays["minutes"] = arrays["time"] / 60
+        arrays["pyramids"] = {key: min_max_pyramid(arrays["minutes"], arrays[key]) for key in SERIES_KEYS}
+
+        self.workouts[workout_id] = arrays
+        self.size += self.__size(arrays)
+
+        # Removing the least recently used workouts, but never the workout that was just added.
+        while self.size > self.max_bytes and len(self.workouts) > 1:
+            workout_id, removed = self.workouts.popitem(last=False)
+            self.size -= self.__size(removed)
+
+        return arrays
+
+    @staticmethod
+    def __size(arrays):
+        """Helper method used to find the amount of memory in bytes used by the plot arrays of a workout."""
+        # The first level of each pyramid is the arrays of the data series, so it is not counted twice.
+        pyramid_size = sum(x.nbytes + y.nbytes for levels in arrays["pyramids"].values() for x, y in levels[1:])
+
+        return sum(array.nbytes for key, array in arrays.items() if key != "pyramids") + pyramid_size
@@ -0,0 +1,58 @@
+"""
+Module containing the level-of-detail pyramids of the data series that are plotted in the workout history tab. Each
+level of a pyramid divides the data series into buckets that contain LEVEL_FACTOR times more samples than the buckets
+of the level below, and keeps the minimum and maximum of each bucket, so the peaks of the data series are visible at
+every level. The level that is plotted is chosen so the amount of points is proportional to the width of the graph in
+pixels instead of the length of the workout.
+"""
+import numpy as np
+
+# The amount of buckets of a level that are combined into a single bucket of the level above.
+LEVEL_FACTOR = 4
+
+# The pyramid stops when a level has fewer buckets than this.
+MIN_BUCKETS = 256
+
+
+def min_max_pyramid(x, y):
+    """
+    Creates the level-of-detail pyramid of a data series. The first level is the data series itself and each of the
+    other levels contains two points for each bucket, the minimum and the maximum, at the x-coordinate of the first
+    sample in the bucket.
+
+    :param x: The x-coordinate of each sample, in increasing order.
+    :param y: The value of each sample.
+    :return: A list with a tuple with the format (x, y) for each level, with the most detailed level first.
+    """
+    levels = [(x, y)]
+
+    lows, highs, starts = y, y, x
+    while len(starts) > MIN_BUCKETS:
+        # Combining the buckets of the level below, where the last bucket can contain fewer buckets than the others.
+        indices = np.arange(0, len(starts), LEVEL_FACTOR)
+        lows = np.minimum.reduceat(lows, indices)
+        highs = np.maximum.reduceat(highs, indices)
+        starts = starts[indices]
+
+        levels.append((np.repeat(starts, 2), np.column_stack([lows, highs]).ravel()))
+
+    return levels
+
+
+def select_level(levels, x_min, x_max, pixels):
+    """
+    Returns the points of the most detailed level that has at most two points per pixel within the given range of
+    x-coordinates. Only the points within the range, and a single point on each side, are returned.
+
+    :param levels: The level-of-detail pyramid, as returned by min_max_pyramid().
+    :param x_min: The smallest visible x-coordinate.
+    :param x_max: The largest visible x-coordinate.
+    :param pixels: The width of the graph in pixels.
+    :return: A tuple with the format (x, y) with the points that should be plotted.
+    """
+    for level, (x, y) in enumerate(levels):
+        start = max(int(np.searchsorted(x, x_min, side="left")) - 1, 0)
+        end = min(int(np.searchsorted(x, x_max, side="right")) + 1, len(x))
+
+        if end - start <= 2 * pixels or level == len(levels) - 1:
+            return x[start:end], y[start:end]
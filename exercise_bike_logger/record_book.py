@@ -0,0 +1,135 @@
+"""
+Module containing the record book of the workout history, which contains a leaderboard of the best workouts for each
+record, both of all time and of each year and month.
+"""
+import bisect
+import time
+
+# The records that are found in the workout history, where each record is a key-value pair with the name of the record
+# as the key and the workout attribute that the record is the maximum value of as the value.
+RECORDS = {"longest_workout": "duration", "longest_distance": "total_distance",
+           "most_calories_burned": "total_calories", "highest_average_speed": "avg_speed",
+           "highest_average_rpm": "avg_rpm", "highest_average_heart_rate": "avg_heart_rate",
+           "highest_average_watt": "avg_watt", "highest_speed": "max_speed", "highest_rpm": "max_rpm",
+           "highest_heart_rate": "max_heart_rate", "highest_watt": "max_watt"}
+
+# The period containing every workout.
+ALL_TIME = "all"
+
+
+class RecordBook:
+    """
+    This class maintains the leaderboards of the best workouts for each record and period, where the periods are all
+    time, each year (for example "2019") and each month (for example "2019-08"). Each leaderboard is a sorted list of
+    at most the given size, where each element is a list with the format [-value, -id, date of workout], so the best
+    workout is first and ties are won by the most recent workout. Workouts are inserted with binary search, meaning that
+    the leaderboards never have to be built again. When a workout in a full leaderboard is removed, the leaderboard is
+    refilled with a query of the storage backend.
+    """
+    def __init__(self, size, leaderboards=None):
+        """
+        Method called when a RecordBook object is initialized.
+
+        :param size: The maximum amount of workouts in each leaderboard.
+        :param leaderboards: A dictionary with the saved leaderboards, as returned by to_dict(). If None, the record
+        book is empty.
+        """
+        self.size = size
+
+        # Dictionary with a dictionary for each record, where each key is a period and the value is the sorted list.
+        self.leaderboards = {record: {ALL_TIME: []} for record in RECORDS}
+
+        if leaderboards is not None:
+            for record, periods in leaderboards.items():
+                self.leaderboards[record].update(periods)
+
+    def add(self, workout):
+        """
+        Inserts a single workout into the leaderboards of each record for all time and for the year and month of the
+        workout. The workout is dropped from a leaderboard again if it is not among the best workouts.
+
+        :param workout: A dictionary containing the summary of the workout, including the id.
+        """
+        workout_id = int(workout["id"])
+        periods = self.__periods(workout_id)
+
+        for record, key in RECORDS.items():
+            entry = [-workout[key], -workout_id, workout["date_time"]]
+            for period in periods:
+                entries = self.leaderboards[record].setdefault(period, [])
+                bisect.insort(entries, entry)
+                del entries[self.size:]
+
+    def remove(self, workout, store):
+        """
+        Removes a single workout from the leaderboards of each record. A full leaderboard might not contain the next
+        best workout, so it is refilled from the storage backend, leaving out the removed workout. Leaderboards of years
+        and months without any workouts are removed.
+
+        :param workout: A dictionary containing the summary of the workout, including the id.
+        :param store: The storage backend used to refill the leaderboards.
+        """
+        workout_id = int(workout["id"])
+        periods = self.__periods(workout_id)
+
+        for record, key in RECORDS.items():
+            for period in periods:
+                entries = self.leaderboards[record].get(period, [])
+
+                # Since [-value, -id] is smaller than any element starting with it, this finds the workout.
+                i = bisect.bisect_left(entries, [-workout[key], -workout_id])
+                if i == len(entries) or entries[i][1] != -workout_id:
+                    continue
+
+                if len(entries) < self.size:
+                    del entries[i]
+                else:
+                    summaries = store.max_values(key, self.size + 1, *self.__period_range(period))
+                    entries[:] = [[-summary[key], -int(summary["id"]), summary["date_time"]] for summary in summaries
+                                  if int(summary["id"]) != workout_id][:self.size]
+
+                if period != ALL_TIME and len(entries) == 0:
+                    self.leaderboards[record].pop(period, None)
+
+    def top(self, record, size, period=ALL_TIME):
+        """
+        Returns the leaderboard of the given record and period.
+
+        :param record: The name of the record, which is one of the keys in RECORDS.
+        :param size: The maximum amount of workouts in the leaderboard, which is at most the size of the record book.
+        :param period: The period, which is either ALL_TIME, a year like "2019" or a month like "2019-08".
+        :return: A list of tuples with the format (value, date of workout, id of workout), with the best workout first.
+        """
+        entries = self.leaderboards[record].get(period, [])
+
+        return [(-value, date_time, str(-negative_id)) for value, negative_id, date_time in entries[:size]]
+
+    def to_dict(self):
+        """Returns the leaderboards of each record and period as a dictionary that can be saved as json."""
+        return self.leaderboards
+
+    @staticmethod
+    def __periods(workout_id):
+        """Returns the periods of the workout with the given id, which is the unix time the workout was started."""
+        date = time.localtime(workout_id)
+
+        return [ALL_TIME, f"{date.tm_year}", f"{date.tm_year}-{date.tm_mon:02d}"]
+
+    @staticmethod
+    def __period_range(period):
+        """
+        Returns the first unix time of the given period and the first unix time after the period, in local time.
+
+        :return: A tuple with the format (start, end), which is (None, None) for all time.
+        """
+        if period == ALL_TIME:
+            return None, None
+
+        parts = [int(part) for part in period.split("-")]
+        if len(parts) == 1:
+            first, last = (parts[0], 1), (parts[0] + 1, 1)
+        else:
+            year, month = parts
+            first, last = (year, month), (year + month // 12, month % 12 + 1)
+
+        return tuple(int(time.mktime((year, month, 1, 0, 0, 0, 0, 0, -1))) for year, month in [first, last])
@@ -0,0 +1,100 @@
+"""
+Module containing the append-only log that the samples of a live workout session are written to while the session is
+ongoing. If the application crashes or the session is interrupted, the log is left behind and can be used to recover
+the workout the next time the application is started.
+
+The log starts with a json header line describing the session, followed by a fixed size binary record for each sample.
+A record that was only partially written when the application crashed is ignored when the log is read.
+"""
+import json
+import os
+import struct
+
+# The format of a sample record: elapsed seconds, speed, rpm, distance, calories, heart rate, watt and level.
+RECORD = struct.Struct("<IfHfHHfB")
+
+
+class SessionLog:
+    """
+    This class describes the append-only log of a single live workout session. The samples are buffered and written to
+    the log in small batches, and each batch is flushed all the way to the disk, meaning that only the samples in the
+    buffer can be lost if the application crashes.
+    """
+    def __init__(self, path, header, flush_interval=10):
+        """
+        Method called when a SessionLog object is initialized. This creates the log file and writes the header.
+
+        :param path: The path of the log file.
+        :param header: A dictionary describing the session, which is needed to recover the workout from the log.
+        :param flush_interval: The maximum amount of samples that are buffered before they are written to the log.
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+
+        self.buffer = []
+
+        self.file = open(path, "wb")
+        self.file.write(json.dumps(header).encode("utf-8") + b"\n")
+        self.__sync()
+
+    def append(self, sample):
+        """
+        Appends a sample to the log. The sample is written to the disk when the buffer is full.
+
+        :param sample: A tuple with the format (elapsed seconds, speed, rpm, distance, calories, heart rate, watt,
+        level).
+        """
+        self.buffer.append(RECORD.pack(*sample))
+
+        if len(self.buffer) >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered samples to the log and flushes them to the disk."""
+        if len(self.buffer) == 0:
+            return
+
+        self.file.write(b"".join(self.buffer))
+        self.buffer.clear()
+        self.__sync()
+
+    def close(self):
+        """Writes the remaining buffered samples and closes the log."""
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+    def discard(self):
+        """Closes and deletes the log. This should be called when the session is saved or deliberately stopped."""
+        self.close()
+        os.remove(self.path)
+
+    def __sync(self):
+        """Flushes the file buffers of both Python and the operating system to the disk."""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+
+def read_log(path):
+    """
+    Reads the header and the samples from a session log.
+
+    :param path: The path of the log file.
+    :return: A tuple with the format (header, samples) where samples is a list of sample tuples.
+    """
+    with open(path, "rb") as log_file:
+        content = log_file.read()
+
+    header_end = content.index(b"\n")
+    header = json.loads(content[:header_end].decode("utf-8"))
+
+    # Ignoring the last record if it was only partially written.
+    records = content[header_end + 1:]
+    records = records[:len(records) - len(records) % RECORD.size]
+
+    return header, list(RECORD.iter_unpack(records))
+
+
+def find_unfinished_logs(directory="../data/sessions"):
+    """Returns the paths of the session logs in the given directory, which are the logs of unfinished sessions."""
+    return [entry.path for entry in os.scandir(directory) if entry.name.endswith(".log")]
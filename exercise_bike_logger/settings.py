@@ -6,7 +6,11 @@ class Settings:
     """
     The "Settings" class defines methods that can be used throughout the application to load and
     save the connection settings. This includes the MAC address of the connected device and the uuid of the
-    characteristic that is used to gather data from the exercise bike.
+    characteristic that is used to gather data from the exercise bike. The settings also contain the storage backend
+    that is used to save the workout history, which is either "files" or "sqlite", whether workout files should be
+    parsed in parallel when the workout history is loaded and the amount of workouts shown in the leaderboards. Parsing
+    in parallel only matters for workouts saved as json files by earlier versions of the application, which have to be
+    parsed completely the first time they are indexed, and only on a machine with several processors.
     """
     def __init__(self):
         # If the settings file does not already exist then create a new empty settings file.
@@ -15,6 +19,9 @@ class Settings:
 
         self.address = ""
         self.characteristic_uuid = ""
+        self.storage_backend = "files"
+        self.parallel_loading = False
+        self.leaderboard_size = 5
         self.load_settings()
 
     def load_settings(self):
@@ -24,13 +31,21 @@ class Settings:
             self.address = settings["address"]
             self.characteristic_uuid = settings["characteristic uuid"]
 
+            # Settings that were added later are optional so older settings files can still be loaded.
+            self.storage_backend = settings.get("storage backend", self.storage_backend)
+            self.parallel_loading = settings.get("parallel loading", self.parallel_loading)
+            self.leaderboard_size = settings.get("leaderboard size", self.leaderboard_size)
+
     def save_settings(self):
         """Saving the current settings to the the settings file"""
         with open("../resources/settings.json", "w") as settings_file:
-            json.dump({"address": self.address, "characteristic uuid": self.characteristic_uuid}, settings_file)
+            json.dump({"address": self.address, "characteristic uuid": self.characteristic_uuid,
+                       "storage backend": self.storage_backend, "parallel loading": self.parallel_loading,
+                       "leaderboard size": self.leaderboard_size}, settings_file)
 
     @staticmethod
     def create_file():
         """Creates an empty settings file."""
         with open("../resources/settings.json", "w+") as settings_file:
-            json.dump({"address": "", "characteristic uuid": ""}, settings_file)
+            json.dump({"address": "", "characteristic uuid": "", "storage backend": "files", "parallel loading": False,
+                       "leaderboard size": 5}, settings_file)
@@ -0,0 +1,301 @@
+"""
+Module containing the aggregator that maintains the totals, records, histograms, rollup and training load of the
+workout history. It is built in a single pass over the workout summaries, updated incrementally when workouts are
+added or removed, and saved next to the workout data so it does not have to be built again the next time the
+application is started. New workouts are appended to a journal next to the saved state, so adding a workout does not
+rewrite the state. The journal is merged into the state when the state is loaded.
+"""
+import json
+import os
+
+from exercise_bike_logger.histograms import merge_histograms
+from exercise_bike_logger.record_book import RecordBook, RECORDS, ALL_TIME
+from exercise_bike_logger.statistics_rollup import StatisticsRollup
+from exercise_bike_logger.summary_table import SummaryTable
+from exercise_bike_logger.training_load import TrainingLoad
+from exercise_bike_logger.workout_index import summary_hash
+
+# The version of the saved state. If the saved state has a different version it is rebuilt from the workout history.
+STATE_VERSION = 1
+
+
+class StatisticsAggregator:
+    """
+    This class maintains the totals, records, histograms, rollup and training load of the workout history. The records
+    are kept in a record book containing the leaderboards of each record for all time and for each year and month, so a
+    record can be replaced without going through the workout history when the workout holding it is removed.
+    """
+    def __init__(self, store, leaderboard_size=5, state_path="../data/statistics.json"):
+        """
+        Method called when a StatisticsAggregator object is initialized.
+
+        :param store: The storage backend containing the workout history.
+        :param leaderboard_size: The maximum amount of workouts in each leaderboard of the record book.
+        :param state_path: The path of the file in which the state of the aggregator is saved. The journal of the state
+        is saved in the same path with the ".journal" extension added.
+        """
+        self.store = store
+        self.leaderboard_size = leaderboard_size
+        self.state_path = state_path
+        self.journal_path = f"{state_path}.journal"
+
+        self.totals = {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
+
+        # The merged histograms of every workout.
+        self.histograms = {}
+
+        # The record book containing the leaderboards of each record.
+        self.records = RecordBook(leaderboard_size)
+
+        # The year -> month -> day rollup used by the interactive graph.
+        self.rollup = StatisticsRollup()
+
+        # The daily stress scores and the acute and chronic load of each day.
+        self.training_load = TrainingLoad()
+
+        # Set with the ids of the workouts that are aggregated, which is used to ignore workouts that are added twice.
+        self.workout_ids = set()
+
+        # The sum of the hashes of the summaries of the aggregated workouts, modulo 2^64, which is used together with
+        # the amount of workouts to check that the saved state matches the workout history.
+        self.fingerprint = 0
+
+    def load(self):
+        """
+        Loads the saved state and the workouts in the journal if they match the workout history in the storage backend,
+        otherwise the state is built from the summaries, using a summary table so the totals and leaderboards are
+        computed with vectorised operations, and saved. The state is compared with the summary hashes of the storage
+        backend, so the summaries are only loaded when the state has to be built.
+        """
+        hashes = self.store.summary_hashes()
+
+        saved_workouts = self.__read_state()
+        if saved_workouts is not None:
+            # Adding the workouts that were added since the state was saved, after which the workout ids of the state
+            # are only the journaled workouts.
+            journaled = self.__read_journal()
+            for workout in journaled:
+                self.add(workout)
+
+            fingerprint = sum(hashes.values()) % 2 ** 64
+            if saved_workouts + len(self.workout_ids) == len(hashes) and self.fingerprint == fingerprint:
+                self.workout_ids = {int(workout_id) for workout_id in hashes}
+
+                # Merging the journal into the saved state, so the journal does not grow across sessions.
+                if journaled:
+                    self.save()
+                return
+
+        summaries = self.store.load_summaries()
+        fingerprint = sum(summary_hash(summary) for summary in summaries) % 2 ** 64
+
+        self.__init__(self.store, self.leaderboard_size, self.state_path)
+        table = SummaryTable(summaries)
+
+        self.workout_ids = {int(workout_id) for workout_id in table.ids}
+        self.fingerprint = fingerprint
+        self.totals = table.totals()
+        self.records = RecordBook(self.leaderboard_size, {record: self.__leaderboards(table, key)
+                                                          for record, key in RECORDS.items()})
+
+        self.rollup.add_table(table)
+
+        for summary in summaries:
+            merge_histograms(self.histograms, summary["histograms"])
+            self.rollup.add_histograms(summary)
+
+        self.training_load.add_workouts(summaries)
+
+        self.save()
+
+    def add(self, workout):
+        """
+        Adds a single workout to the totals, records, histograms, rollup and training load.
+
+        :param workout: A dictionary containing the summary of the workout, including the id.
+        """
+        workout_id = int(workout["id"])
+        if workout_id in self.workout_ids:
+            return
+
+        self.workout_ids.add(workout_id)
+        self.fingerprint = (self.fingerprint + summary_hash(workout)) % 2 ** 64
+
+        self.totals["workouts"] += 1
+        self.totals["time"] += workout["duration"]
+        self.totals["distance"] += workout["total_distance"]
+        self.totals["calories"] += workout["total_calories"]
+        merge_histograms(self.histograms, workout["histograms"])
+
+        self.records.add(workout)
+        self.rollup.add(workout)
+        self.training_load.add(workout)
+
+    def remove(self, workout):
+        """
+        Removes a single workout from the totals, records, histograms, rollup and training load.
+
+        :param workout: A dictionary containing the summary of the workout, including the id.
+        """
+        workout_id = int(workout["id"])
+        if workout_id not in self.workout_ids:
+            return
+
+        self.workout_ids.remove(workout_id)
+        self.fingerprint = (self.fingerprint - summary_hash(workout)) % 2 ** 64
+
+        self.totals["workouts"] -= 1
+        self.totals["time"] -= workout["duration"]
+        self.totals["distance"] -= workout["total_distance"]
+        self.totals["calories"] -= workout["total_calories"]
+        merge_histograms(self.histograms, workout["histograms"], -1)
+
+        self.records.remove(workout, self.store)
+        self.rollup.remove(workout)
+        self.training_load.remove(workout)
+
+    def record(self, record):
+        """
+        Returns the given record as a tuple with the format (value, date of workout, id of workout), or None if there
+        are no workouts.
+        """
+        leaderboard = self.records.top(record, 1)
+
+        return leaderboard[0] if leaderboard else None
+
+    def leaderboard(self, record, size, period=ALL_TIME):
+        """
+        Returns the leaderboard of the given record and period as a list of tuples with the format
+        (value, date of workout, id of workout), with the best workout first.
+
+        :param record: The name of the record.
+        :param size: The maximum amount of workouts in the leaderboard.
+        :param period: The period, which is either all time, a year like "2019" or a month like "2019-08".
+        """
+        return self.records.top(record, size, period)
+
+    def period_histograms(self, period=ALL_TIME):
+        """
+        Returns the merged histograms of the workouts within the given period.
+
+        :param period: The period, which is either all time, a year like "2019" or a month like "2019-08".
+        :return: A dictionary with a histogram for each data series.
+        """
+        if period == ALL_TIME:
+            return self.histograms
+
+        return self.rollup.histograms(*[int(part) for part in period.split("-")])
+
+    def statistics(self):
+        """
+        Returns a dictionary with a key-value pair for each distinct statistic. If the statistic concerns a single
+        workout the value is a tuple with the format (statistic, date of workout, id of workout).
+        """
+        statistics = {"total_workouts": self.totals["workouts"], "total_time": self.totals["time"],
+                      "total_distance": self.totals["distance"], "total_calories": self.totals["calories"]}
+
+        for record in RECORDS:
+            statistics[record] = self.record(record)
+
+        return statistics
+
+    def journal(self, workout):
+        """
+        Appends the summary of a single added workout to the journal. Only the new summary is written, so the time it
+        takes does not depend on the size of the workout history.
+
+        :param workout: A dictionary containing the summary of the workout, including the id.
+        """
+        with open(self.journal_path, "a", encoding="utf-8") as journal_file:
+            journal_file.write(json.dumps({"version": STATE_VERSION, "summary": workout}, ensure_ascii=False) + "\n")
+
+    def save(self):
+        """
+        Saves the state of the aggregator to the state file and removes the journal, since it is contained in the state.
+        The state is written to a temporary file first, so the saved state is never incomplete.
+        """
+        temporary_path = f"{self.state_path}.tmp"
+        with open(temporary_path, "w", encoding="utf-8") as state_file:
+            json.dump({"version": STATE_VERSION, "workouts": len(self.workout_ids),
+                       "fingerprint": self.fingerprint, "leaderboard_size": self.leaderboard_size,
+                       "totals": self.totals, "histograms": self.histograms, "records": self.records.to_dict(),
+                       "rollup": self.rollup.to_dict(), "training_load": self.training_load.to_dict()},
+                      state_file, ensure_ascii=False)
+
+        os.replace(temporary_path, self.state_path)
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def __read_state(self):
+        """
+        Reads the saved state from the state file if it was saved with the same version and leaderboard size. The
+        workout ids are not saved, so the workout ids are left empty.
+
+        :return: The amount of workouts in the saved state, or None if the state is missing or outdated.
+        """
+        try:
+            with open(self.state_path, "r") as state_file:
+                state = json.load(state_file)
+        except (OSError, ValueError):
+            return None
+
+        if state.get("version") != STATE_VERSION or state.get("leaderboard_size") != self.leaderboard_size:
+            return None
+
+        self.totals = state["totals"]
+        self.histograms = state["histograms"]
+        self.records = RecordBook(self.leaderboard_size, state["records"])
+        self.rollup = StatisticsRollup(state["rollup"])
+        self.training_load = TrainingLoad(state["training_load"])
+        self.workout_ids = set()
+        self.fingerprint = state["fingerprint"]
+
+        return state["workouts"]
+
+    def __read_journal(self):
+        """Reads the summaries of the workouts that were added since the state file was saved."""
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as journal_file:
+                lines = journal_file.readlines()
+        except OSError:
+            return []
+
+        workouts = []
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line is incomplete if the application crashed while writing it. The state is built again
+                # since it does not match the workout history without the workout.
+                continue
+
+            if entry.get("version") == STATE_VERSION:
+                workouts.append(entry["summary"])
+
+        return workouts
+
+    def __leaderboards(self, table, key):
+        """
+        Helper method used to build the leaderboards of the given workout attribute for all time and for each year and
+        month from the summary table.
+
+        :return: A dictionary where each key is a period and the value is the sorted list of the record book.
+        """
+        leaderboards = {ALL_TIME: self.__entries(table, key, table.top(key, self.leaderboard_size))}
+
+        year_keys, year_rows = table.group_top(key, self.leaderboard_size, "year")
+        for year, rows in zip(year_keys.tolist(), year_rows):
+            leaderboards[str(year)] = self.__entries(table, key, rows)
+
+        month_keys, month_rows = table.group_top(key, self.leaderboard_size, "month")
+        for month, rows in zip(month_keys.tolist(), month_rows):
+            leaderboards[f"{month // 100}-{month % 100:02d}"] = self.__entries(table, key, rows)
+
+        return leaderboards
+
+    @staticmethod
+    def __entries(table, key, rows):
+        """Helper method used to create the record book entries of the given rows of the summary table."""
+        return [[-value, -int(table.ids[row]), table.date_times[row]]
+                for row, value in zip(rows.tolist(), table.columns[key][rows].tolist())]
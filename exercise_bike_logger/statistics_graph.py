@@ -0,0 +1,179 @@
+"""
+Module containing the interactive graph of the statistics tab. The artists of the graph are created once and updated in
+place, so changing the data or the layer of the graph only changes the heights, positions and labels of the existing
+artists before the canvas is redrawn.
+"""
+import math
+
+from matplotlib import dates as mdates
+from matplotlib.ticker import FixedFormatter, FixedLocator, NullLocator
+
+# The window lengths in seconds that are marked on the x-axis of the curves, together with their labels.
+CURVE_TICKS = [(5, "5s"), (15, "15s"), (30, "30s"), (60, "1m"), (300, "5m"), (1200, "20m"), (3600, "1h"),
+               (7200, "2h")]
+
+
+class StatisticsGraph:
+    """
+    This class owns the artists of the statistics graph, which are a pool of bars used for the totals of each time
+    frame, a line for each training load series, a line for the mean-maximal curves and a text used for messages. Bars
+    are only created when a layer has more time frames than any previous layer and otherwise hidden when not used. The
+    pick event is connected once.
+    """
+    def __init__(self, widget, on_pick):
+        """
+        Method called when a StatisticsGraph object is initialized.
+
+        :param widget: The MplWidget that the graph is drawn on.
+        :param on_pick: The function that is called when a bar, a tick label or the curve is clicked.
+        """
+        self.canvas = widget.canvas
+        self.ax = widget.canvas.ax
+
+        # The pool of bars, where the first bars are used by the current layer and the rest are hidden.
+        self.bars = []
+
+        # The lines of the training load graph, the line marking zero and the legend of the lines.
+        self.lines = {"chronic": self.ax.plot([], [], color="#4b6bc8", label="Fitness (chronic load)")[0],
+                      "acute": self.ax.plot([], [], color="#CD0000", label="Fatigue (acute load)")[0],
+                      "form": self.ax.plot([], [], color="#FFFF00", label="Form")[0]}
+        self.zero_line = self.ax.axhline(0, color="white", linewidth=0.5)
+        self.curve_line = self.ax.plot([], [], color="#FFA500", picker=True, pickradius=5)[0]
+        self.legend = self.ax.legend(handles=list(self.lines.values()), facecolor="#31363b")
+        for text in self.legend.get_texts():
+            text.set_color("white")
+
+        self.message = self.ax.text(0.5, 0.5, "", color="white", fontsize=14, ha="center", va="center",
+                                    transform=self.ax.transAxes)
+
+        self.canvas.mpl_connect("pick_event", on_pick)
+
+        self.__show_artists(bars=0, lines=False, curve=False)
+
+    def show_message(self, message):
+        """Hides the data of the graph and shows the given message in the middle of the graph instead."""
+        self.__show_artists(bars=0, lines=False, curve=False)
+        self.message.set_text(message)
+        self.message.set_visible(True)
+
+        self.ax.set_xticks([])
+        self.ax.set_ylabel("")
+
+        self.canvas.draw_idle()
+
+    def show_bars(self, labels, values, y_label):
+        """
+        Shows a bar for each time frame. The tick labels can be clicked to go a layer deeper in the graph.
+
+        :param labels: A list with the label of each time frame.
+        :param values: A list with the value of each time frame.
+        :param y_label: The label of the y-axis.
+        """
+        # Creating the bars that are missing in the pool.
+        if len(values) > len(self.bars):
+            self.bars.extend(self.ax.bar(range(len(self.bars), len(values)), 0, picker=True).patches)
+
+        for x, (bar, value) in enumerate(zip(self.bars, values)):
+            bar.set_x(x - bar.get_width() / 2)
+            bar.set_height(value)
+
+        self.__show_artists(bars=len(values), lines=False, curve=False)
+
+        self.ax.xaxis.set_major_locator(FixedLocator(range(len(values))))
+        self.ax.xaxis.set_major_formatter(FixedFormatter([str(label) for label in labels]))
+        self.ax.tick_params(axis="x", labelrotation=0)
+        self.ax.set_xlim(-0.6, max(len(values), 1) - 0.4)
+        self.ax.set_ylim(0, max(max(values, default=0) * 1.05, 1))
+
+        for label in self.ax.get_xticklabels():
+            label.set_picker(True)
+
+        self.ax.set_ylabel(y_label, color="white", fontsize=12)
+
+        self.canvas.draw_idle()
+
+    def show_lines(self, dates, series, y_label):
+        """
+        Shows a line for each series with the dates on the x-axis.
+
+        :param dates: A list with the date of each value.
+        :param series: A dictionary with a list of values for each line, with the same keys as the lines.
+        :param y_label: The label of the y-axis.
+        """
+        x = mdates.date2num(dates)
+        for key, line in self.lines.items():
+            line.set_data(x, series[key])
+
+        self.__show_artists(bars=0, lines=True, curve=False)
+
+        locator = mdates.AutoDateLocator()
+        self.ax.xaxis.set_major_locator(locator)
+        self.ax.xaxis.set_major_formatter(mdates.AutoDateFormatter(locator))
+        self.ax.tick_params(axis="x", labelrotation=30)
+
+        # The dates cannot be clicked since the graph cannot go a layer deeper from a date.
+        for label in self.ax.get_xticklabels():
+            label.set_picker(False)
+
+        if len(x) > 0:
+            values = [value for key in self.lines for value in series[key]]
+            margin = max((max(values) - min(values)) * 0.05, 1)
+            self.ax.set_xlim(x[0], max(x[-1], x[0] + 1))
+            self.ax.set_ylim(min(values) - margin, max(values) + margin)
+
+        self.ax.set_ylabel(y_label, color="white", fontsize=12)
+
+        self.canvas.draw_idle()
+
+    def show_curve(self, windows, values, y_label):
+        """
+        Shows the best average of a data series for each window length, with the window lengths on a logarithmic
+        x-axis so the short and the long efforts are equally visible. The curve can be clicked to go to the workout
+        with the best average.
+
+        :param windows: A list with the window lengths in seconds.
+        :param values: A list with the best average for each window length, where NaN means that no workout is long
+        enough for the window.
+        :param y_label: The label of the y-axis.
+        """
+        self.curve_line.set_data(windows, values)
+
+        self.__show_artists(bars=0, lines=False, curve=True)
+
+        # Only the windows that at least one workout is long enough for are shown, which are the first windows.
+        finite = [value for value in values if not math.isnan(value)]
+        last = max(windows[len(finite) - 1] if finite else windows[-1], windows[0] * 2)
+        self.ax.set_xlim(windows[0], last)
+        self.ax.set_ylim(0, max(max(finite, default=0) * 1.05, 1))
+
+        ticks = [(window, label) for window, label in CURVE_TICKS if windows[0] <= window <= last]
+        self.ax.xaxis.set_major_locator(FixedLocator([window for window, label in ticks]))
+        self.ax.xaxis.set_major_formatter(FixedFormatter([label for window, label in ticks]))
+        self.ax.xaxis.set_minor_locator(NullLocator())
+        self.ax.tick_params(axis="x", labelrotation=0)
+
+        # The window lengths cannot be clicked since the curves have no layers.
+        for label in self.ax.get_xticklabels():
+            label.set_picker(False)
+
+        self.ax.set_ylabel(y_label, color="white", fontsize=12)
+
+        self.canvas.draw_idle()
+
+    def __show_artists(self, bars, lines, curve):
+        """
+        Helper method used to show the given amount of bars, either show or hide the training load lines and either show
+        or hide the curve. The x-axis is only logarithmic when the curve is shown.
+        """
+        self.ax.set_xscale("log" if curve else "linear")
+
+        for i, bar in enumerate(self.bars):
+            bar.set_visible(i < bars)
+
+        for line in self.lines.values():
+            line.set_visible(lines)
+        self.zero_line.set_visible(lines)
+        self.legend.set_visible(lines)
+        self.curve_line.set_visible(curve)
+
+        self.message.set_visible(False)
@@ -0,0 +1,92 @@
+import threading
+
+from PyQt5 import QtCore
+
+from exercise_bike_logger.worker import Worker
+
+
+class StatisticsJobs(QtCore.QObject):
+    """
+    Class that runs the statistics computations in a worker thread, so the GUI thread never waits for the aggregator.
+    The jobs are run one at a time in the order they are submitted, which means that the aggregator is never accessed
+    by two threads at once and that a job always sees the changes of the jobs submitted before it.
+
+    Each job has a name, and a newer job with the same name supersedes the older job. A superseded job is skipped if it
+    has not started yet, and its result is discarded if it has. The results are cached with the history version, which
+    is incremented each time the workout history is changed, so a result is reused until the workout history changes.
+    """
+    # Signal emitted with the name and the result of a job when the job is finished and has not been superseded.
+    finished = QtCore.pyqtSignal(str, object)
+
+    def __init__(self):
+        """Method called when the statistics jobs are initialized."""
+        super(StatisticsJobs, self).__init__()
+
+        # A thread pool with a single thread, so the jobs are run one at a time.
+        self.threadpool = QtCore.QThreadPool()
+        self.threadpool.setMaxThreadCount(1)
+
+        # The lock protects the attributes below, which are used by both the GUI thread and the worker thread.
+        self.lock = threading.Lock()
+
+        # Counter that is incremented each time the workout history is changed.
+        self.history_version = 0
+
+        # Dictionary with the number of the most recent job with each name.
+        self.latest_jobs = {}
+
+        # Dictionary with the cached results where the key has the format (history version, name, key).
+        self.cache = {}
+
+    def request(self, name, key, function, *args):
+        """
+        Requests the result of a job. If the result is cached for the current history version it is emitted right away,
+        otherwise the function is called in the worker thread and the result is emitted when it is done.
+
+        :param name: The name of the job. A newer job with the same name supersedes this job.
+        :param key: The key that the result is cached with together with the name and history version.
+        :param function: The function that computes the result.
+        """
+        with self.lock:
+            job = self.latest_jobs.get(name, 0) + 1
+            self.latest_jobs[name] = job
+
+            cache_key = (self.history_version, name, key)
+            cached = cache_key in self.cache
+            result = self.cache.get(cache_key)
+
+        if cached:
+            self.finished.emit(name, result)
+        else:
+            self.threadpool.start(Worker(self.__run, name, job, cache_key, function, *args))
+
+    def update(self, function, *args):
+        """
+        Changes the workout history of the statistics by calling the function in the worker thread. The history version
+        is incremented right away, so jobs requested after this are not answered with results from before the change.
+
+        :param function: The function that changes the workout history of the statistics.
+        """
+        with self.lock:
+            self.history_version += 1
+            self.cache.clear()
+
+        self.threadpool.start(Worker(function, *args))
+
+    def __run(self, name, job, cache_key, function, *args):
+        """Helper method used to run a job in the worker thread, unless the job is superseded."""
+        with self.lock:
+            if self.latest_jobs[name] != job:
+                return
+
+        result = function(*args)
+
+        with self.lock:
+            # Results computed with an outdated workout history are not cached.
+            if cache_key[0] == self.history_version:
+                self.cache[cache_key] = result
+
+            superseded = self.latest_jobs[name] != job
+
+        if not superseded:
+            self.finished.emit(name, result)
@@ -0,0 +1,184 @@
+"""
+Module containing the rollup of the workout history that is used by the interactive graph in the statistics tab. The
+rollup contains the totals of each year, month and day with at least one workout, meaning that each layer of the
+interactive graph can be created with a lookup instead of going through the workouts within the time frame. The merged
+histograms of each year and month are also part of the rollup.
+"""
+import calendar
+import time
+
+from exercise_bike_logger.histograms import merge_histograms
+
+# The month names used as the keys of the month layer of the interactive graph, where the month number is the index.
+MONTH_NAMES = list(calendar.month_name)
+
+
+class StatisticsRollup:
+    """
+    This class maintains the hierarchical rollup year -> month -> day of the workout history. Each node in the hierarchy
+    contains the total amount of workouts, time in seconds, distance and calories within the time frame of the node,
+    and the year and month nodes also contain the merged histograms. The keys of the hierarchy are strings so the rollup
+    can be saved as json without any conversion.
+    """
+    def __init__(self, years=None):
+        """
+        Method called when a StatisticsRollup object is initialized.
+
+        :param years: A dictionary with the saved hierarchy, as returned by to_dict(). If None, the rollup is empty.
+        """
+        # Dictionary with a key-value pair for each year where the value has the format
+        # {"totals": totals, "histograms": histograms, "months": {month: {"totals": totals, "histograms": histograms,
+        # "days": {day: totals}}}}.
+        self.years = {} if years is None else years
+
+    def add(self, workout):
+        """
+        Adds the data from a single workout to the totals of the year, month and day of the workout.
+
+        :param workout: A dictionary containing the summary of the workout.
+        """
+        self.__update(workout, 1)
+
+    def remove(self, workout):
+        """
+        Removes the data from a single workout from the totals of the year, month and day of the workout. Time frames
+        without any workouts are removed from the rollup.
+
+        :param workout: A dictionary containing the summary of the workout.
+        """
+        self.__update(workout, -1)
+
+    def add_table(self, table):
+        """
+        Adds the data from every workout in the summary table to the rollup. The totals of each year, month and day are
+        computed with vectorised operations, so this is much faster than adding the workouts one at a time. The
+        histograms are not part of the summary table, so they are added with add_histograms() afterwards.
+
+        :param table: A SummaryTable containing the summaries of the workouts.
+        """
+        for period in ["year", "month", "day"]:
+            keys, totals = table.group_totals(period)
+
+            for i, key in enumerate(keys.tolist()):
+                if period == "year":
+                    node = self.years.setdefault(str(key), self.__empty_node("months"))["totals"]
+                elif period == "month":
+                    node = self.years[str(key // 100)]["months"].setdefault(str(key % 100),
+                                                                            self.__empty_node("days"))["totals"]
+                else:
+                    node = self.years[str(key // 10000)]["months"][str(key // 100 % 100)]["days"].setdefault(
+                        str(key % 100), self.__empty_totals())
+
+                node["workouts"] += int(totals["workouts"][i])
+                node["time"] += int(totals["time"][i])
+                node["distance"] += float(totals["distance"][i])
+                node["calories"] += int(totals["calories"][i])
+
+    def add_histograms(self, workout):
+        """
+        Adds the histograms of a single workout to the year and month of the workout. The year and month must already
+        be part of the rollup.
+
+        :param workout: A dictionary containing the summary of the workout.
+        """
+        year_node, month_node = self.__nodes(workout)
+        merge_histograms(year_node["histograms"], workout["histograms"])
+        merge_histograms(month_node["histograms"], workout["histograms"])
+
+    def histograms(self, year, month=None):
+        """
+        Returns the merged histograms of the given year, or the given month of the year if a month is given.
+
+        :param year: The year as a number.
+        :param month: The month as a number.
+        :return: A dictionary with a histogram for each data series, which is empty if there are no workouts.
+        """
+        node = self.years.get(str(year), {"histograms": {}, "months": {}})
+        if month is not None:
+            node = node["months"].get(str(month), {"histograms": {}})
+
+        return node["histograms"]
+
+    def layer(self, search_keys):
+        """
+        Returns the data used in the given layer of the interactive graph.
+
+        :param search_keys: The list of keys used to specify the current "layer" of the interactive graph. For example,
+        search_keys = [2019, "August"] means that we should return the daily data for august 2019.
+        :return: A dictionary where each key is a time frame and the value is the totals within that time frame, with
+        the time in minutes. For example, {2018: totals_2018, 2019: totals_2019, 2020: totals_2020}.
+        """
+        # If there are no search keys then we are on the year layer of the interactive graph.
+        if len(search_keys) == 0:
+            return {int(year): self.__graph_totals(node["totals"])
+                    for year, node in sorted(self.years.items(), key=lambda item: int(item[0]))}
+
+        year = int(search_keys[0])
+        months = self.years.get(str(year), {"months": {}})["months"]
+
+        # If there is one search key then we are on the month layer of the interactive graph.
+        if len(search_keys) == 1:
+            return {MONTH_NAMES[month]: self.__graph_totals(months.get(str(month), {}).get("totals"))
+                    for month in range(1, 13)}
+
+        # If there are two search keys then we are one the day layer of the interactive graph.
+        month = MONTH_NAMES.index(search_keys[1])
+        days = months.get(str(month), {"days": {}})["days"]
+
+        return {day: self.__graph_totals(days.get(str(day)))
+                for day in range(1, calendar.monthrange(year=year, month=month)[1] + 1)}
+
+    def to_dict(self):
+        """Returns the hierarchy of the rollup as a dictionary that can be saved as json."""
+        return self.years
+
+    def __update(self, workout, sign):
+        """Helper method used to add (sign = 1) or remove (sign = -1) the data from the workout to the rollup."""
+        # The dates of the workouts are saved in local time.
+        date = time.localtime(workout["unix_time"])
+        day, month, year = str(date.tm_mday), str(date.tm_mon), str(date.tm_year)
+
+        year_node = self.years.setdefault(year, self.__empty_node("months"))
+        month_node = year_node["months"].setdefault(month, self.__empty_node("days"))
+        day_totals = month_node["days"].setdefault(day, self.__empty_totals())
+
+        merge_histograms(year_node["histograms"], workout["histograms"], sign)
+        merge_histograms(month_node["histograms"], workout["histograms"], sign)
+
+        for totals in [year_node["totals"], month_node["totals"], day_totals]:
+            totals["workouts"] += sign
+            totals["time"] += sign * workout["duration"]
+            totals["distance"] += sign * workout["total_distance"]
+            totals["calories"] += sign * workout["total_calories"]
+
+        # Removing the time frames that no longer contain any workouts.
+        if day_totals["workouts"] == 0:
+            del month_node["days"][day]
+        if month_node["totals"]["workouts"] == 0:
+            del year_node["months"][month]
+        if year_node["totals"]["workouts"] == 0:
+            del self.years[year]
+
+    def __nodes(self, workout):
+        """Helper method used to find the year and month nodes of the workout."""
+        date = time.localtime(workout["unix_time"])
+        year_node = self.years[str(date.tm_year)]
+
+        return year_node, year_node["months"][str(date.tm_mon)]
+
+    def __empty_node(self, children):
+        """Helper method used to create an empty year node (children = "months") or month node (children = "days")."""
+        return {"totals": self.__empty_totals(), "histograms": {}, children: {}}
+
+    @staticmethod
+    def __empty_totals():
+        return {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
+
+    @staticmethod
+    def __graph_totals(totals):
+        """Helper method used to convert totals into the totals shown in the graph, where the time is in minutes."""
+        if totals is None:
+            return {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
+
+        return {"workouts": totals["workouts"], "time": totals["time"] / 60, "distance": totals["distance"],
+                "calories": totals["calories"]}
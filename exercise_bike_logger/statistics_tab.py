@@ -1,40 +1,73 @@
-import datetime
 import calendar
+import datetime
+import time
 
-from dateutil import parser
 from matplotlib.text import Text
 
+from exercise_bike_logger.effort_curves import CURVE_WINDOWS, EffortCurveCache
+from exercise_bike_logger.histograms import percentiles
+from exercise_bike_logger.statistics_aggregator import StatisticsAggregator
+from exercise_bike_logger.statistics_graph import StatisticsGraph
+from exercise_bike_logger.statistics_jobs import StatisticsJobs
+from exercise_bike_logger.statistics_rollup import MONTH_NAMES
+from exercise_bike_logger.workout_file import seconds_to_timestamp
+
 
 class StatisticsTab:
     def __init__(self, main_window):
         self.main_window = main_window
 
         # Dictionary that will contain a key-value pair for each distinct statistic. If the statistic concerns a single
-        # workout the value is a tuple with the format (statistic, date of workout).
+        # workout the value is a tuple with the format (statistic, date of workout, id of workout).
         self.statistics = {}
 
+        # Dictionaries with the leaderboards of each record and the percentiles of each data series for each period.
+        self.leaderboards = {}
+        self.distributions = {}
+
+        # The aggregator that maintains the totals and records of the workout history. It is only used by the jobs,
+        # which run in a worker thread, so the GUI thread only uses the results of the jobs.
+        self.aggregator = StatisticsAggregator(self.main_window.store, self.main_window.settings.leaderboard_size)
+        self.jobs = StatisticsJobs()
+
+        # The cached mean-maximal curves of the workouts, which are only computed when a curve is shown.
+        self.effort_curves = EffortCurveCache()
+
+        # Dictionary used to find the data series and the y label of each curve in the data combobox.
+        self.curve_series = {"power curve": ("watt", "Best average watt"), "rpm curve": ("rpm", "Best average RPM"),
+                             "speed curve": ("speed", "Best average speed (km/h)")}
+
+        # List with the id of the workout with the best average for each window length of the shown curve, which is
+        # used to go to the workout when the curve is clicked.
+        self.curve_workout_ids = []
+        self.jobs.finished.connect(self.on_job_finished)
+
         # List that will contain the search keys used to specify the "layer" of the interactive graph.
         self.search_keys = []
 
         # Dictionary that will contain the data that is used in the interactive graph.
-        self.interactive_data = self.get_interactive_graph_data(self.main_window.model.workouts, self.search_keys)
+        self.interactive_data = {}
+
+        # The interactive graph, which creates its artists once and connects the pick event once.
+        self.graph = StatisticsGraph(self.main_window.statisticsGraphWidget, self.on_pick)
+
+        # The statistics are computed when the workout history is loaded, which is done in the background.
+        self.show_computing_state()
 
-        if len(self.main_window.model.workouts) != 0:
-            self.process_workouts()
-            self.update_display()
+        # Dictionary used to find the record that belongs to a date button when the button is clicked.
+        self.record_buttons = {"longestWorkoutDateButton": "longest_workout",
+                               "longestDistanceDateButton": "longest_distance",
+                               "mostCaloriesBurnedDateButton": "most_calories_burned",
+                               "highAvgSpeedDateButton": "highest_average_speed",
+                               "highAvgRPMDateButton": "highest_average_rpm",
+                               "highAvgHeartRateDateButton": "highest_average_heart_rate",
+                               "highAvgWattDateButton": "highest_average_watt",
+                               "highSpeedDateButton": "highest_speed", "highRPMDateButton": "highest_rpm",
+                               "highHeartRateDateButton": "highest_heart_rate", "highWattDateButton": "highest_watt"}
 
         # When a date is clicked we go to that specific workout in the workout history.
-        self.main_window.longestWorkoutDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.longestDistanceDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.mostCaloriesBurnedDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highAvgSpeedDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highAvgRPMDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highAvgHeartRateDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highAvgWattDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highSpeedDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highRPMDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highHeartRateDateButton.clicked.connect(self.go_to_workout)
-        self.main_window.highWattDateButton.clicked.connect(self.go_to_workout)
+        for button_name in self.record_buttons:
+            getattr(self.main_window, button_name).clicked.connect(self.go_to_workout)
 
         # When the back button is pressed we go back a single step in the interactive graph.
         self.main_window.backButton.clicked.connect(self.back)
@@ -42,91 +75,285 @@ class StatisticsTab:
         # When the data combobox is changed we update the graph.
         self.main_window.dataComboBox.currentIndexChanged.connect(self.update_graph)
 
+    def load_statistics(self):
+        """
+        Computes the statistics and the data for the interactive graph in the background and updates the display when
+        they are computed. This should be called when the workout history is loaded.
+        """
+        self.jobs.update(self.process_workouts)
+        self.request_statistics()
+
+    def request_statistics(self):
+        """Requests the statistics and the data for the current layer of the interactive graph from the jobs."""
+        self.jobs.request("statistics", None, self.compute_statistics)
         self.update_graph()
 
+    def on_job_finished(self, name, result):
+        """
+        Updates the display or the graph with the result of a job. This is run in the GUI thread.
+
+        :param name: The name of the job.
+        :param result: The result of the job.
+        """
+        if name == "statistics":
+            self.statistics, self.leaderboards, self.distributions = result
+
+            if self.statistics["total_workouts"] != 0:
+                self.update_display()
+            else:
+                self.show_empty_state()
+        elif name == "graph" and result[0] == "bars":
+            self.interactive_data = result[1]
+            self.plot_totals()
+        elif name == "graph" and result[0] == "curve":
+            data_name, values, self.curve_workout_ids = result[1:]
+            self.graph.show_curve(list(CURVE_WINDOWS), list(values), self.curve_series[data_name][1])
+        elif name == "graph":
+            dates, acute, chronic, form = result[1]
+            self.graph.show_lines(dates, {"acute": acute, "chronic": chronic, "form": form}, "Training load")
+
+    def show_computing_state(self):
+        """Updates the labels and the graph in the statistics tab to show that the statistics are being computed."""
+        self.__set_labels("Computing...")
+        self.graph.show_message("Computing...")
+
+    def show_empty_state(self):
+        """Updates the labels in the statistics tab to show that the workout history does not contain any workouts."""
+        self.__set_labels("")
+
+        self.main_window.totalWorkoutsLabel.setText("0")
+        self.main_window.totalTimeLabel.setText(str(datetime.timedelta(seconds=0)))
+        self.main_window.totalDistanceLabel.setText("0 km")
+        self.main_window.totalCaloriesLabel.setText("0")
+
+    def __set_labels(self, text):
+        """Helper method used to set the text of every statistic label and to clear the text of every date button."""
+        for label in [self.main_window.totalWorkoutsLabel, self.main_window.totalTimeLabel,
+                      self.main_window.totalDistanceLabel, self.main_window.totalCaloriesLabel,
+                      self.main_window.longestWorkoutLabel, self.main_window.longestDistanceLabel,
+                      self.main_window.mostCaloriesBurnedLabel, self.main_window.highAvgSpeedLabel,
+                      self.main_window.highAvgRPMLabel, self.main_window.highAvgHeartRateLabel,
+                      self.main_window.highAvgWattLabel, self.main_window.highSpeedLabel,
+                      self.main_window.highRPMLabel, self.main_window.highHeartRateLabel,
+                      self.main_window.highWattLabel]:
+            label.setText(text)
+
+        for button in [self.main_window.longestWorkoutDateButton, self.main_window.longestDistanceDateButton,
+                       self.main_window.mostCaloriesBurnedDateButton, self.main_window.highAvgSpeedDateButton,
+                       self.main_window.highAvgRPMDateButton, self.main_window.highAvgHeartRateDateButton,
+                       self.main_window.highAvgWattDateButton, self.main_window.highSpeedDateButton,
+                       self.main_window.highRPMDateButton, self.main_window.highHeartRateDateButton,
+                       self.main_window.highWattDateButton]:
+            button.setText("")
+
     def go_to_workout(self):
         """Retrieves the date that was clicked and goes to that specific workout in the workout history."""
-        clicked_date = self.main_window.sender().text()
+        record = self.record_buttons[self.main_window.sender().objectName()]
 
-        # Finding the workout list model index of the workout with the clicked date.
-        dates = [workout["date_time"] for workout in self.main_window.model.workouts]
-        date_index = dates.index(clicked_date)
+        # Finding the workout list model row of the workout with the record. The row is fetched if it is not yet loaded.
+        self.show_workout(self.main_window.model.row_of_workout(self.statistics[record][2]))
 
-        # Changing to the tab on the main window that has the workout history and going to the specific workout.
+    def show_workout(self, row):
+        """Changes to the tab on the main window that has the workout history and goes to the workout in the row."""
         self.main_window.mainWindowTab.setCurrentIndex(0)
-        self.main_window.workoutListView.setCurrentIndex(self.main_window.model.createIndex(date_index, 0))
+        self.main_window.workoutListView.setCurrentIndex(self.main_window.model.createIndex(row, 0))
 
     def update_display(self):
         """Updates the labels in the statistics tab."""
         self.main_window.totalWorkoutsLabel.setText(str(self.statistics["total_workouts"]))
-        self.main_window.totalTimeLabel.setText(self.statistics["total_time"])
-        self.main_window.totalDistanceLabel.setText(f"{self.statistics['total_distance']} km")
+        self.main_window.totalTimeLabel.setText(str(datetime.timedelta(seconds=self.statistics["total_time"])))
+        self.main_window.totalDistanceLabel.setText(f"{round(self.statistics['total_distance'], 1)} km")
         self.main_window.totalCaloriesLabel.setText(str(self.statistics["total_calories"]))
 
-        self.main_window.longestWorkoutLabel.setText(self.statistics["longest_workout"][0])
+        longest_workout = seconds_to_timestamp(self.statistics["longest_workout"][0])
+        self.main_window.longestWorkoutLabel.setText(longest_workout)
         self.main_window.longestWorkoutDateButton.setText(self.statistics["longest_workout"][1])
 
         self.main_window.longestDistanceLabel.setText(f"{self.statistics['longest_distance'][0]} km")
         self.main_window.longestDistanceDateButton.setText(self.statistics["longest_distance"][1])
 
-        self.main_window.mostCaloriesBurnedLabel.setText(self.statistics["most_calories_burned"][0])
+        self.main_window.mostCaloriesBurnedLabel.setText(str(self.statistics["most_calories_burned"][0]))
         self.main_window.mostCaloriesBurnedDateButton.setText(self.statistics["most_calories_burned"][1])
 
         self.main_window.highAvgSpeedLabel.setText(f"{self.statistics['highest_average_speed'][0]} km/h")
         self.main_window.highAvgSpeedDateButton.setText(self.statistics["highest_average_speed"][1])
 
-        self.main_window.highAvgRPMLabel.setText(self.statistics["highest_average_rpm"][0])
+        self.main_window.highAvgRPMLabel.setText(str(self.statistics["highest_average_rpm"][0]))
         self.main_window.highAvgRPMDateButton.setText(self.statistics["highest_average_rpm"][1])
 
-        self.main_window.highAvgHeartRateLabel.setText(self.statistics["highest_average_heart_rate"][0])
+        self.main_window.highAvgHeartRateLabel.setText(str(self.statistics["highest_average_heart_rate"][0]))
         self.main_window.highAvgHeartRateDateButton.setText(self.statistics["highest_average_heart_rate"][1])
 
-        self.main_window.highAvgWattLabel.setText(self.statistics["highest_average_watt"][0])
+        self.main_window.highAvgWattLabel.setText(str(self.statistics["highest_average_watt"][0]))
         self.main_window.highAvgWattDateButton.setText(self.statistics["highest_average_watt"][1])
 
         self.main_window.highSpeedLabel.setText(f"{self.statistics['highest_speed'][0]} km/h")
         self.main_window.highSpeedDateButton.setText(self.statistics["highest_speed"][1])
 
-        self.main_window.highRPMLabel.setText(self.statistics["highest_rpm"][0])
+        self.main_window.highRPMLabel.setText(str(self.statistics["highest_rpm"][0]))
         self.main_window.highRPMDateButton.setText(self.statistics["highest_rpm"][1])
 
-        self.main_window.highHeartRateLabel.setText(self.statistics["highest_heart_rate"][0])
+        self.main_window.highHeartRateLabel.setText(str(self.statistics["highest_heart_rate"][0]))
         self.main_window.highHeartRateDateButton.setText(self.statistics["highest_heart_rate"][1])
 
-        self.main_window.highWattLabel.setText(self.statistics["highest_watt"][0])
+        self.main_window.highWattLabel.setText(str(self.statistics["highest_watt"][0]))
         self.main_window.highWattDateButton.setText(self.statistics["highest_watt"][1])
 
+        self.update_leaderboards()
+        self.update_distributions()
+
+    def update_leaderboards(self):
+        """
+        Updates the tooltips of the date buttons with the leaderboards of the records, which show the best workouts of
+        all time, of the current year and of the current month.
+        """
+        for button_name, record in self.record_buttons.items():
+            lines = []
+            for period_name, period in self.__periods():
+                leaderboard = self.leaderboards[record][period]
+                if leaderboard:
+                    lines.append(f"{period_name}:")
+                    lines.extend(f"{place}. {self.__format_record(record, value)} - {date_time}"
+                                 for place, (value, date_time, workout_id) in enumerate(leaderboard, start=1))
+
+            getattr(self.main_window, button_name).setToolTip("\n".join(lines))
+
+    def update_distributions(self):
+        """
+        Updates the tooltips of the average labels with the median and 90th percentile of the data series of all time,
+        of the current year and of the current month, which are found from the merged histograms in the aggregator.
+        """
+        labels = {"speed": self.main_window.highAvgSpeedLabel, "rpm": self.main_window.highAvgRPMLabel,
+                  "heart_rate": self.main_window.highAvgHeartRateLabel, "watt": self.main_window.highAvgWattLabel}
+
+        for key, label in labels.items():
+            lines = []
+            for period_name, period in self.__periods():
+                median, p90 = self.distributions[key][period]
+                if median is not None:
+                    lines.append(f"{period_name}: median {median}, 90th percentile {p90}")
+
+            label.setToolTip("\n".join(lines))
+
+    @staticmethod
+    def __periods():
+        """Helper method used to find the names and keys of the periods all time, the current year and current month."""
+        today = time.localtime()
+
+        return [("All time", "all"), (str(today.tm_year), str(today.tm_year)),
+                (time.strftime("%B %Y", today), f"{today.tm_year}-{today.tm_mon:02d}")]
+
+    def __format_record(self, record, value):
+        """Helper method used to format the value of a record with the same unit as the record labels."""
+        if record == "longest_workout":
+            return seconds_to_timestamp(value)
+        if record == "longest_distance":
+            return f"{value} km"
+        if record in ("highest_average_speed", "highest_speed"):
+            return f"{value} km/h"
+
+        return str(value)
+
     def update_graph(self):
-        """Updates the graph in the statistics tab according to the chosen combo box configuration."""
-        self.main_window.statisticsGraphWidget.canvas.ax.clear()
+        """
+        Requests the data for the graph in the statistics tab according to the chosen combo box configuration and the
+        current layer of the interactive graph. The graph is updated when the data is computed.
+        """
+        # The graph is updated when the workout history is loaded.
+        if self.jobs.history_version == 0:
+            return
 
+        search_keys = list(self.search_keys)
+        data_name = self.main_window.dataComboBox.currentText().lower()
+        if data_name == "training load":
+            self.jobs.request("graph", ("training load", tuple(search_keys)), self.compute_training_load, search_keys)
+        elif data_name in self.curve_series:
+            # The curves cover the entire workout history, so they do not depend on the layer of the graph.
+            self.jobs.request("graph", (data_name, ()), self.compute_effort_curve, data_name)
+        else:
+            self.jobs.request("graph", ("totals", tuple(search_keys)), self.compute_totals, search_keys)
+
+    def plot_totals(self):
+        """Plots the totals of each time frame in the current layer of the interactive graph."""
         data_name = self.main_window.dataComboBox.currentText().lower()
 
         x = [str(key) for key, value in self.interactive_data.items()]
         y = [value[data_name] for key, value in self.interactive_data.items()]
 
-        self.main_window.statisticsGraphWidget.canvas.ax.bar(x, y, picker=True)
-
-        for label in self.main_window.statisticsGraphWidget.canvas.ax.get_xticklabels():
-            label.set_picker(True)
-
-        self.main_window.statisticsGraphWidget.canvas.fig.canvas.mpl_connect('pick_event', self.on_pick)
-
         # Adding units to the y label if necessary.
         if data_name == "time":
             data_name = f"{data_name} (min)"
         elif data_name == "distance":
             data_name = f"{data_name} (km)"
 
-        self.main_window.statisticsGraphWidget.canvas.ax.set_ylabel(data_name.capitalize(), color="white", fontsize=12)
+        self.graph.show_bars(x, y, data_name.capitalize())
 
-        self.main_window.statisticsGraphWidget.canvas.draw()
+    def compute_statistics(self):
+        """
+        Computes the statistics together with the leaderboards of each record and the percentiles of each data series
+        for each period. This is run in the worker thread of the jobs.
+
+        :return: A tuple with the format (statistics, leaderboards, distributions).
+        """
+        size = self.main_window.settings.leaderboard_size
+        periods = [period for period_name, period in self.__periods()]
+
+        leaderboards = {record: {period: self.aggregator.leaderboard(record, size, period) for period in periods}
+                        for record in self.record_buttons.values()}
+        distributions = {key: {period: percentiles(self.aggregator.period_histograms(period), key, (0.5, 0.9))
+                               for period in periods}
+                         for key in ["speed", "rpm", "heart_rate", "watt"]}
+
+        return self.aggregator.statistics(), leaderboards, distributions
+
+    def compute_totals(self, search_keys):
+        """
+        Looks up the totals of each time frame in the given layer of the interactive graph. This is run in the worker
+        thread of the jobs.
+
+        :return: A tuple with the format ("bars", totals of each time frame).
+        """
+        return "bars", self.get_interactive_graph_data(search_keys)
+
+    def compute_training_load(self, search_keys):
+        """
+        Computes the acute load, chronic load and form of each day within the time frame of the given layer of the
+        interactive graph, meaning all time, a single year or a single month. This is run in the worker thread of the
+        jobs.
+
+        :return: A tuple with the format ("lines", (dates, acute, chronic, form)).
+        """
+        # Finding the first and last date of the time frame, where None means the first workout and today.
+        first, last = None, None
+        if len(search_keys) == 1:
+            first, last = datetime.date(int(search_keys[0]), 1, 1), datetime.date(int(search_keys[0]), 12, 31)
+        elif len(search_keys) == 2:
+            year, month = int(search_keys[0]), MONTH_NAMES.index(search_keys[1])
+            first = datetime.date(year, month, 1)
+            last = datetime.date(year, month, calendar.monthrange(year, month)[1])
+
+        return "lines", self.aggregator.training_load.series(first, last)
+
+    def compute_effort_curve(self, data_name):
+        """
+        Computes the all-time best average of the data series of the given curve for each window length. The
+        mean-maximal curves of the workouts that are not cached yet or have changed are computed first, which is only
+        every workout the first time a curve is shown. This is run in the worker thread of the jobs.
+
+        :param data_name: The name of the curve in the data combobox, for example "power curve".
+        :return: A tuple with the format ("curve", name of the curve, best average for each window length, id of the
+        workout with the best average for each window length).
+        """
+        self.effort_curves.update(self.main_window.store, self.main_window.store.summary_hashes())
+
+        values, workout_ids = self.effort_curves.envelope(self.curve_series[data_name][0])
+
+        return "curve", data_name, values, workout_ids
 
     def back(self):
         """Going back a single step in the interactive graph by removing a search key from the list of search keys."""
         if len(self.search_keys) > 0:
             del self.search_keys[-1]
-            self.interactive_data = self.get_interactive_graph_data(self.main_window.model.workouts, self.search_keys)
             self.update_graph()
 
     def on_pick(self, event):
@@ -135,119 +362,57 @@ class StatisticsTab:
             # Ensuring that we cannot go deeper than the layer of the interactive graph that show daily totals.
             if len(self.search_keys) < 2:
                 self.search_keys.append(text.get_text())
-                self.interactive_data = self.get_interactive_graph_data(self.main_window.model.workouts,
-                                                                        self.search_keys)
                 self.update_graph()
+            else:
+                # Going to the most recent workout of the day when a day is clicked in the layer with daily totals.
+                date = f"{int(text.get_text()):02d}-{MONTH_NAMES.index(self.search_keys[1]):02d}-{self.search_keys[0]}"
+                rows = self.main_window.model.rows_of_date(date)
+                if rows:
+                    self.show_workout(rows[0])
+        elif event.artist is self.graph.curve_line:
+            # Going to the workout with the best average for the window length closest to where the curve was clicked.
+            workout_id = self.curve_workout_ids[event.ind[0]]
+            if workout_id is not None:
+                self.show_workout(self.main_window.model.row_of_workout(workout_id))
 
     def process_workouts(self):
-        """Processes the internal workout list model to extract the needed statistics so they can be displayed."""
-        workouts = self.main_window.model.workouts
-
-        # Calculating each statistic one by one using the data, starting with the total amount of workouts.
-        self.statistics["total_workouts"] = len(workouts)
-
-        # Getting the total time in seconds and converting it to the format "DD day(s), HH:MM:SS".
-        seconds = [self.main_window.timestamp_to_seconds(workout["duration"]) for workout in workouts]
-        self.statistics["total_time"] = str(datetime.timedelta(seconds=sum(seconds)))
-
-        self.statistics["total_distance"] = str(round(sum([workout["total_distance"] for workout in workouts]), 1))
-        self.statistics["total_calories"] = str(sum([workout["total_calories"] for workout in workouts]))
-
-        longest_workout = workouts[seconds.index(max(seconds))]
-        self.statistics["longest_workout"] = (str(longest_workout["duration"]), longest_workout["date_time"])
-
-        self.statistics["longest_distance"] = self.get_max_value_date(workouts, "total_distance")
-        self.statistics["most_calories_burned"] = self.get_max_value_date(workouts, "total_calories")
-        self.statistics["highest_average_speed"] = self.get_max_value_date(workouts, "avg_speed")
-        self.statistics["highest_average_rpm"] = self.get_max_value_date(workouts, "avg_rpm")
-        self.statistics["highest_average_heart_rate"] = self.get_max_value_date(workouts, "avg_heart_rate")
-        self.statistics["highest_average_watt"] = self.get_max_value_date(workouts, "avg_watt")
-        self.statistics["highest_speed"] = self.get_max_value_date(workouts, "max_speed")
-        self.statistics["highest_rpm"] = self.get_max_value_date(workouts, "max_rpm")
-        self.statistics["highest_heart_rate"] = self.get_max_value_date(workouts, "max_heart_rate")
-        self.statistics["highest_watt"] = self.get_max_value_date(workouts, "max_watt")
+        """
+        Loads the totals, records and rollup of the workout history so they can be displayed. The saved statistics are
+        used if they match the loaded workout history, otherwise they are computed in a single pass over the workouts.
+        This is run in the worker thread of the jobs.
+        """
+        self.aggregator.load()
 
-    @staticmethod
-    def get_max_value_date(workouts, key):
+    def add_workout(self, workout):
         """
-        Finds the index of the workout with the maximum value for the given key.
+        Updates the statistics, the display and the interactive graph with a single new workout, without processing
+        the rest of the workouts again. This should be called when a new workout is finished.
 
-        :param workouts: A list of dictionaries where each dictionary represents a workout.
-        :param key: The specific attribute that we search for the maximum value for.
-        :return: The maximum value and the date of the workout with the maximum value.
+        :param workout: A dictionary containing the summary of the new workout.
         """
-        # Extracting the specific data from each workout in the workout list model.
-        key_list = [workout[key] for workout in workouts]
+        # If the workout history is still being loaded, the new workout is included when the statistics are computed.
+        if self.jobs.history_version == 0:
+            return
 
-        max_index = key_list.index(max(key_list))
+        self.jobs.update(self.add_to_aggregator, workout)
+        self.request_statistics()
 
-        return str(workouts[max_index][key]), workouts[max_index]["date_time"]
+    def add_to_aggregator(self, workout):
+        """
+        Adds a single new workout to the aggregator and appends it to the journal of the saved state. This is run in the
+        worker thread of the jobs.
+        """
+        self.aggregator.add(workout)
+        self.aggregator.journal(workout)
 
-    def get_interactive_graph_data(self, workouts, search_keys):
+    def get_interactive_graph_data(self, search_keys):
         """
-        Goes through the workouts and extracts the data that will be used in the interactive graph. The search keys are
-        used to find the data specific to the current configuration of the interactive graph.
+        Looks up the data that will be used in the graph for the current configuration of the interactive graph in the
+        rollup of the workout history.
 
-        :param workouts: A list of dictionaries where each dictionary represents a workout.
         :param search_keys: The list of keys used to specify the current "layer" of the interactive graph. For example,
-        search_keys = [2019, 8] means that we should return the daily data for august 2019.
+        search_keys = [2019, "August"] means that we should return the daily data for august 2019.
         :return: A dictionary where each key is a time frame and the value is the totals within that time frame.
         For example, {2018: totals_2018, 2019: totals_2019, 2020: totals_2020}.
         """
-        # Reversing the list of workouts so they are to the data in chronological order.
-        workouts = workouts[::-1]
-
-        data = {}
-
-        # If there are no search keys then we are on the year layer of the interactive graph.
-        if len(search_keys) == 0:
-            for workout in workouts:
-                date_time = parser.parse(workout["date_time"], dayfirst=True)
-
-                # Creating a new data dict if the key does not exist meaning that it's the first workout of the year.
-                data[date_time.year] = data.get(date_time.year,
-                                                {"workouts": 0, "time": 0, "distance": 0, "calories": 0})
-
-                # Adding the data from the workout to the total data for this year.
-                self.add_data_to_totals(workout, data, date_time.year)
-
-        # If there is one search key then we are on the month layer of the interactive graph.
-        if len(search_keys) == 1:
-            # Setting up the dictionary by creating a key-value pair for each month.
-            for month in ["January", "February", "March", "April", "May", "June", "July", "August", "September",
-                          "October", "November", "December"]:
-                data[month] = {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
-
-            # Going through the workouts and adding the data to the totals if the year matches the search key.
-            for workout in workouts:
-                date_time = parser.parse(workout["date_time"], dayfirst=True)
-
-                if date_time.year == int(search_keys[0]):
-                    # Adding the data from the workout to the total data for this month.
-                    self.add_data_to_totals(workout, data, date_time.strftime("%B"))
-
-        # If there are two search keys then we are one the day layer of the interactive graph.
-        if len(search_keys) == 2:
-            # Creating a dictionary used to convert a month string into the month number.
-            month_num = {value: key for key, value in enumerate(calendar.month_name)}
-
-            # Setting up the dictionary by creating a key-value pair for each day in the given month.
-            for i in range(1, calendar.monthrange(year=int(search_keys[0]), month=month_num[search_keys[1]])[1] + 1):
-                data[i] = {"workouts": 0, "time": 0, "distance": 0, "calories": 0}
-
-            # Going through the workouts and adding the data to the totals if the year and month match the search keys.
-            for workout in workouts:
-                date_time = parser.parse(workout["date_time"], dayfirst=True)
-
-                if date_time.year == int(search_keys[0]) and date_time.strftime("%B") == search_keys[1]:
-                    # Adding the data from the workout to the total data for this day.
-                    self.add_data_to_totals(workout, data, date_time.day)
-
-        return data
-
-    def add_data_to_totals(self, workout, dictionary, key):
-        """Helper method used to add the data from the workout to the totals for the key of the dictionary."""
-        dictionary[key]["workouts"] += 1
-        dictionary[key]["time"] += self.main_window.timestamp_to_seconds(workout["duration"]) / 60
-        dictionary[key]["distance"] += workout["total_distance"]
-        dictionary[key]["calories"] += workout["total_calories"]
+        return self.aggregator.rollup.layer(search_keys)
@@ -0,0 +1,174 @@
+"""
+Module containing the summary table, which holds the summaries of the workout history as a set of numpy column arrays
+so totals, records, filters and totals per period can be computed with vectorised operations instead of going through
+a list of dictionaries.
+"""
+import operator
+import time
+
+import numpy as np
+
+# The numeric attributes of a workout that are saved in the summary table and the data type of each column.
+NUMERIC_COLUMNS = [("unix_time", np.int64), ("program_level", np.int64), ("duration", np.int64),
+                   ("total_distance", np.float64), ("total_calories", np.int64), ("avg_speed", np.float64),
+                   ("avg_rpm", np.float64), ("avg_heart_rate", np.float64), ("avg_watt", np.float64),
+                   ("max_speed", np.float64), ("max_rpm", np.int64), ("max_heart_rate", np.int64),
+                   ("max_watt", np.float64)]
+
+# The periods that the totals can be grouped by.
+PERIODS = ["year", "month", "day"]
+
+
+class SummaryTable:
+    """
+    This class holds the summaries of the workout history as column arrays, with a row for each workout and the most
+    recent workout in the first row. The local year, month and day of each workout are computed once when the table is
+    created, so grouping the workouts by period does not require any date conversions.
+    """
+    def __init__(self, summaries):
+        """
+        Method called when a SummaryTable object is initialized.
+
+        :param summaries: A list of dictionaries where each dictionary is the summary of a workout, with the most recent
+        first.
+        """
+        self.ids = [summary["id"] for summary in summaries]
+        self.date_times = [summary["date_time"] for summary in summaries]
+
+        # Dictionary with a numpy array for each numeric attribute of the workouts.
+        self.columns = {key: np.fromiter(map(operator.itemgetter(key), summaries), dtype=dtype, count=len(summaries))
+                        for key, dtype in NUMERIC_COLUMNS}
+
+        # The programs are saved as codes into the list of distinct program names, so they can be compared as integers.
+        self.program_names, program_codes = np.unique([summary["program_name"] for summary in summaries],
+                                                      return_inverse=True)
+        self.columns["program_code"] = program_codes.reshape(-1).astype(np.int64)
+
+        self.__add_date_columns()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def mask(self, start=None, end=None, program_name=None, program_level=None):
+        """
+        Returns a boolean array that selects the workouts matching the given filters.
+
+        :param start: If given, only workouts started at or after this unix time are selected.
+        :param end: If given, only workouts started before this unix time are selected.
+        :param program_name: If given, only workouts with this program are selected.
+        :param program_level: If given, only workouts with this level are selected.
+        """
+        mask = np.ones(len(self), dtype=bool)
+
+        if start is not None:
+            mask &= self.columns["unix_time"] >= start
+        if end is not None:
+            mask &= self.columns["unix_time"] < end
+        if program_name is not None:
+            codes = np.flatnonzero(self.program_names == program_name)
+            mask &= self.columns["program_code"] == (codes[0] if len(codes) != 0 else -1)
+        if program_level is not None:
+            mask &= self.columns["program_level"] == program_level
+
+        return mask
+
+    def totals(self, mask=None):
+        """
+        Returns a dictionary with the total amount of workouts, time in seconds, distance and calories of the workouts
+        selected by the given mask, or of every workout if no mask is given.
+        """
+        columns = self.columns if mask is None else {key: self.columns[key][mask] for key in
+                                                     ["duration", "total_distance", "total_calories"]}
+
+        return {"workouts": int(len(columns["duration"])), "time": int(columns["duration"].sum()),
+                "distance": float(columns["total_distance"].sum()), "calories": int(columns["total_calories"].sum())}
+
+    def top(self, key, size, mask=None):
+        """
+        Returns the rows of the workouts with the largest values for the given key among the workouts selected by the
+        given mask, with the best workout first. If a value is tied the most recent workout comes first.
+
+        :param key: The numeric attribute that the workouts are ranked by.
+        :param size: The maximum amount of rows that are returned.
+        :param mask: A boolean array selecting the workouts. If None, every workout is included.
+        :return: A numpy array with the rows.
+        """
+        rows = np.arange(len(self)) if mask is None else np.flatnonzero(mask)
+
+        # Sorting by the value and then by the start time, both descending. The last key is the primary key of lexsort.
+        order = np.lexsort((-self.columns["unix_time"][rows], -self.columns[key][rows]))
+
+        return rows[order[:size]]
+
+    def group_totals(self, period):
+        """
+        Returns the totals of each period, for example each month, containing at least one workout.
+
+        :param period: The period that the workouts are grouped by, which is either "year", "month" or "day".
+        :return: A tuple with the format (keys, totals) where keys is a sorted array with a key for each period and
+        totals is a dictionary with an array for the workouts, time in seconds, distance and calories of each period.
+        For the month and day periods the key is the year * 100 + month and year * 10000 + month * 100 + day
+        respectively.
+        """
+        keys, groups = np.unique(self.__period_keys(period), return_inverse=True)
+        groups = groups.reshape(-1)
+
+        totals = {"workouts": np.bincount(groups, minlength=len(keys))}
+        for name, key in [("time", "duration"), ("distance", "total_distance"), ("calories", "total_calories")]:
+            totals[name] = np.bincount(groups, weights=self.columns[key], minlength=len(keys))
+
+        return keys, totals
+
+    def group_top(self, key, size, period):
+        """
+        Returns the rows of the workouts with the largest values for the given key within each period, for example each
+        month, containing at least one workout. The workouts are ranked the same way as by top().
+
+        :param key: The numeric attribute that the workouts are ranked by.
+        :param size: The maximum amount of rows for each period.
+        :param period: The period that the workouts are grouped by, which is either "year", "month" or "day".
+        :return: A tuple with the format (keys, rows) where keys is a sorted array with a key for each period, with the
+        same format as in group_totals(), and rows is a list with an array of rows for each period.
+        """
+        period_keys = self.__period_keys(period)
+
+        # Sorting by the period and then by the value and the start time, so the workouts of each period are ranked
+        # next to each other. The rank of a workout is its position after the first workout of the period.
+        order = np.lexsort((-self.columns["unix_time"], -self.columns[key], period_keys))
+        keys, starts, counts = np.unique(period_keys[order], return_index=True, return_counts=True)
+        ranks = np.arange(len(order)) - np.repeat(starts, counts)
+
+        # Keeping the best rows of each period and splitting them at the first row of each period.
+        ends = np.cumsum(np.minimum(counts, size))
+
+        return keys, (np.split(order[ranks < size], ends[:-1]) if len(keys) != 0 else [])
+
+    def __period_keys(self, period):
+        """Helper method used to find the key of the given period of each workout, as described in group_totals()."""
+        if period not in PERIODS:
+            raise ValueError(f"Cannot group the workouts by \"{period}\".")
+
+        period_keys = self.columns["year"]
+        if period in ("month", "day"):
+            period_keys = period_keys * 100 + self.columns["month"]
+        if period == "day":
+            period_keys = period_keys * 100 + self.columns["day"]
+
+        return period_keys
+
+    def __add_date_columns(self):
+        """
+        Adds the local year, month and day of each workout as columns. The offset from UTC is looked up once for each
+        distinct hour, since the offset only changes on the hour, after which the dates are computed with numpy.
+        """
+        unix_times = self.columns["unix_time"]
+
+        hours, hour_index = np.unique(unix_times // 3600, return_inverse=True)
+        offsets = np.array([time.localtime(int(hour) * 3600).tm_gmtoff for hour in hours], dtype=np.int64)
+
+        days = (unix_times + offsets[hour_index.reshape(-1)]).astype("datetime64[s]").astype("datetime64[D]")
+        months = days.astype("datetime64[M]")
+
+        self.columns["year"] = months.astype("datetime64[Y]").astype(np.int64) + 1970
+        self.columns["month"] = months.astype(np.int64) % 12 + 1
+        self.columns["day"] = (days - months).astype(np.int64) + 1
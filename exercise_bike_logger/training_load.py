@@ -0,0 +1,163 @@
+"""
+Module containing the training load model of the workout history. Each workout is given a stress score, where an hour
+at the threshold power (or threshold heart rate if the workout has no watt data) is 100 points. The daily stress scores
+are smoothed with exponentially weighted moving averages into the acute load (fatigue) and the chronic load (fitness),
+and the difference between them is the form. The stress scores are computed from the histograms in the summaries, so
+the data series of the workouts are never loaded.
+"""
+import datetime
+import math
+
+from exercise_bike_logger.histograms import HISTOGRAM_BINS
+
+# The time constants in days of the acute and chronic load.
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 42
+
+# The power in watt and the heart rate that can be sustained for about an hour, which the stress scores are relative to.
+THRESHOLD_POWER = 200
+THRESHOLD_HEART_RATE = 170
+
+# The weight of the stress score of the current day in each moving average.
+ACUTE_FACTOR = 1 - math.exp(-1 / ACUTE_DAYS)
+CHRONIC_FACTOR = 1 - math.exp(-1 / CHRONIC_DAYS)
+
+
+def stress_score(workout):
+    """
+    Computes the stress score of a workout from the watt histogram, or the heart rate histogram if the workout has no
+    watt data. Each second counts with the square of the intensity, meaning the value relative to the threshold, using
+    the center of the bin as the value.
+
+    :param workout: A dictionary containing the summary of the workout.
+    :return: The stress score of the workout.
+    """
+    histograms = workout["histograms"]
+
+    # A histogram with only the first bin means that the value was always close to zero.
+    key, threshold = ("watt", THRESHOLD_POWER) if len(histograms["watt"]) > 1 else ("heart_rate", THRESHOLD_HEART_RATE)
+    width = HISTOGRAM_BINS[key][0]
+
+    intensity_seconds = sum(count * (((i + 0.5) * width) / threshold) ** 2 for i, count in enumerate(histograms[key]))
+
+    return round(intensity_seconds / 3600 * 100, 1)
+
+
+class TrainingLoad:
+    """
+    This class maintains the daily stress scores of the workout history together with the acute and chronic load of
+    each day from the first workout to the last workout. Since each day only depends on the day before, adding or
+    removing a workout only updates the loads from the day of the workout and forward.
+    """
+    def __init__(self, state=None):
+        """
+        Method called when a TrainingLoad object is initialized.
+
+        :param state: A dictionary with the saved daily stress scores, as returned by to_dict(). If None, the training
+        load is empty.
+        """
+        # The ordinal of the date of the first day, where the index of each day in the lists is relative to this day.
+        self.start = None if state is None else state["start"]
+
+        # Lists with the summed stress score, the acute load and the chronic load of each day.
+        self.loads = [] if state is None else state["loads"]
+        self.acute = []
+        self.chronic = []
+
+        self.__update(0)
+
+    def add(self, workout):
+        """Adds the stress score of a single workout to the day of the workout."""
+        self.add_workouts([workout])
+
+    def add_workouts(self, workouts):
+        """
+        Adds the stress scores of the given workouts to the days of the workouts. The loads are only updated once, from
+        the earliest day of the workouts, so this is much faster than adding the workouts one at a time.
+
+        :param workouts: A list of dictionaries containing the summaries of the workouts.
+        """
+        if not workouts:
+            return
+
+        days = [self.__day(workout) for workout in workouts]
+
+        # Extending the lists so they contain every day of the workouts.
+        if self.start is None:
+            self.start = min(days)
+        elif min(days) < self.start:
+            self.loads[:0] = [0] * (self.start - min(days))
+            self.acute, self.chronic = [], []
+            self.start = min(days)
+
+        if max(days) - self.start >= len(self.loads):
+            self.loads.extend([0] * (max(days) - self.start + 1 - len(self.loads)))
+
+        for day, workout in zip(days, workouts):
+            self.loads[day - self.start] += stress_score(workout)
+
+        self.__update(min(days) - self.start)
+
+    def remove(self, workout):
+        """Removes the stress score of a single workout from the day of the workout."""
+        i = self.__day(workout) - self.start
+        self.loads[i] = max(self.loads[i] - stress_score(workout), 0)
+
+        self.__update(i)
+
+    def series(self, first=None, last=None):
+        """
+        Returns the acute load, chronic load and form of each day within the given dates. Days after the last workout
+        are included, where the loads decay without being saved.
+
+        :param first: The first date, or None to start at the first workout.
+        :param last: The last date, or None to end today.
+        :return: A tuple with the format (dates, acute, chronic, form) where each element is a list with a value for
+        each day.
+        """
+        if self.start is None:
+            return [], [], [], []
+
+        first = self.start if first is None else max(first.toordinal(), self.start)
+        last = datetime.date.today().toordinal() if last is None else last.toordinal()
+
+        dates, acute, chronic = [], [], []
+        for day in range(first, last + 1):
+            i = day - self.start
+
+            if i < len(self.loads):
+                acute.append(self.acute[i])
+                chronic.append(self.chronic[i])
+            else:
+                # Without any workouts the loads decay by a constant factor each day after the last workout.
+                days_after = i - len(self.loads) + 1
+                acute.append(self.acute[-1] * (1 - ACUTE_FACTOR) ** days_after)
+                chronic.append(self.chronic[-1] * (1 - CHRONIC_FACTOR) ** days_after)
+
+            dates.append(datetime.date.fromordinal(day))
+
+        form = [chronic_load - acute_load for acute_load, chronic_load in zip(acute, chronic)]
+
+        return dates, acute, chronic, form
+
+    def to_dict(self):
+        """Returns the daily stress scores as a dictionary that can be saved as json."""
+        return {"start": self.start, "loads": self.loads}
+
+    def __update(self, i):
+        """Helper method used to compute the acute and chronic load of each day from the day with the given index."""
+        del self.acute[i:], self.chronic[i:]
+
+        acute = self.acute[-1] if self.acute else 0
+        chronic = self.chronic[-1] if self.chronic else 0
+        for load in self.loads[i:]:
+            acute += (load - acute) * ACUTE_FACTOR
+            chronic += (load - chronic) * CHRONIC_FACTOR
+
+            self.acute.append(acute)
+            self.chronic.append(chronic)
+
+    @staticmethod
+    def __day(workout):
+        """Helper method used to find the ordinal of the local date of the workout."""
+        return datetime.date.fromtimestamp(workout["unix_time"]).toordinal()
@@ -0,0 +1,301 @@
+"""
+Module containing the binary columnar file format that workouts are saved in. A workout file starts with a fixed size
+header followed by the scalar attributes of the workout encoded as json. The rest of the file contains the data series
+of the workout as contiguous little-endian typed arrays, one column per series, so the series can be read directly with
+numpy.frombuffer or array.array without any parsing.
+
+The layout of a workout file is:
+    - Header: magic bytes (4 bytes), format version (uint16), padding (2 bytes), sample count (uint32) and the length
+      of the scalar attributes in bytes (uint32).
+    - Scalar attributes: utf-8 encoded json object, padded with spaces to a multiple of 4 bytes.
+    - Columns: one array per data series in the order given by COLUMNS, each padded to a multiple of 4 bytes.
+"""
+import collections
+import datetime
+import json
+import mmap
+import struct
+import threading
+
+import numpy as np
+
+from exercise_bike_logger.histograms import histograms_from_series
+
+MAGIC = b"EBLW"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<4sHxxII")
+
+# The data series of a workout and the data type that each series is saved with.
+COLUMNS = [("time", np.dtype("<u4")), ("speed", np.dtype("<f4")), ("rpm", np.dtype("<u2")),
+           ("distance", np.dtype("<f4")), ("calories", np.dtype("<u2")), ("heart_rate", np.dtype("<u2")),
+           ("watt", np.dtype("<f4")), ("level", np.dtype("u1"))]
+
+# The attributes of a workout that contain a data series with an element for each second of the workout.
+SERIES_KEYS = [name for name, dtype in COLUMNS]
+
+# The data series that are saved as floats. These are rounded to a single decimal when exported to json.
+FLOAT_KEYS = [name for name, dtype in COLUMNS if dtype.kind == "f"]
+
+
+def encode_workout(workout):
+    """
+    Encodes a workout into the binary columnar format.
+
+    :param workout: A dictionary with a key-value pair for each attribute of the workout, including the data series.
+    :return: The encoded workout as bytes.
+    """
+    scalars = {key: value for key, value in workout.items() if key not in SERIES_KEYS}
+    scalar_bytes = json.dumps(scalars, ensure_ascii=False).encode("utf-8")
+    scalar_bytes += b" " * (-len(scalar_bytes) % 4)
+
+    sample_count = len(workout["time"])
+    parts = [HEADER.pack(MAGIC, FORMAT_VERSION, sample_count, len(scalar_bytes)), scalar_bytes]
+    for name, dtype in COLUMNS:
+        column = np.asarray(workout[name], dtype=dtype).tobytes()
+        parts.append(column + b"\0" * (-len(column) % 4))
+
+    return b"".join(parts)
+
+
+def decode_workout(buffer):
+    """
+    Decodes a workout from the binary columnar format. The data series are numpy arrays that share memory with the
+    given buffer, meaning that no copy of the data is made.
+
+    :param buffer: A bytes-like object containing an encoded workout.
+    :return: A dictionary with a key-value pair for each attribute of the workout, including the data series.
+    """
+    magic, version, sample_count, scalar_length = HEADER.unpack_from(buffer, 0)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError("The buffer does not contain a workout in a supported format.")
+
+    offset = HEADER.size
+    workout = json.loads(bytes(buffer[offset:offset + scalar_length]).decode("utf-8"))
+    workout.update(decode_series(buffer, offset + scalar_length, sample_count))
+
+    return workout
+
+
+def decode_series(buffer, offset, sample_count):
+    """
+    Decodes the columns of the data series that start at the given offset of the buffer.
+
+    :param buffer: A bytes-like object containing an encoded workout.
+    :param offset: The offset of the first column in the buffer.
+    :param sample_count: The amount of elements in each data series.
+    :return: A dictionary with a numpy array for each data series that shares memory with the buffer.
+    """
+    series = {}
+    for name, dtype in COLUMNS:
+        series[name] = np.frombuffer(buffer, dtype=dtype, count=sample_count, offset=offset)
+        size = sample_count * dtype.itemsize
+        offset += size + (-size % 4)
+
+    return series
+
+
+def write_workout(path, workout):
+    """Writes the workout to the given path in the binary columnar format."""
+    with open(path, "wb") as workout_file:
+        workout_file.write(encode_workout(workout))
+
+
+def read_workout(path):
+    """Reads the workout in the binary columnar format from the given path."""
+    with open(path, "rb") as workout_file:
+        return decode_workout(workout_file.read())
+
+
+def read_scalars(path):
+    """
+    Reads only the scalar attributes of the workout in the binary columnar format from the given path, without
+    reading the data series.
+    """
+    return read_header(path)[0]
+
+
+def read_header(path):
+    """
+    Reads the header and the scalar attributes of the workout in the binary columnar format from the given path.
+
+    :return: A tuple with the format (scalar attributes, sample count, offset of the first column).
+    """
+    with open(path, "rb") as workout_file:
+        magic, version, sample_count, scalar_length = HEADER.unpack(workout_file.read(HEADER.size))
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"The file \"{path}\" does not contain a workout in a supported format.")
+
+        scalars = json.loads(workout_file.read(scalar_length).decode("utf-8"))
+
+    return scalars, sample_count, HEADER.size + scalar_length
+
+
+class MappedWorkout:
+    """
+    A workout in the binary columnar format where the data series are memory-mapped views over the workout file instead
+    of being read into memory. Only the header is read when the object is created. The file is mapped the first time a
+    data series is accessed and the mapping is released again when the pool of mapped workouts needs the space. The
+    object can be used like the dictionary returned by read_workout().
+    """
+    def __init__(self, path, pool):
+        """
+        Method called when a MappedWorkout object is initialized.
+
+        :param path: The path of the workout file.
+        :param pool: The pool that limits how many workouts are mapped at the same time.
+        """
+        self.path = path
+        self.pool = pool
+        self.scalars, self.sample_count, self.offset = read_header(path)
+
+        self.__mapping = None
+        self.__series = None
+
+    def __getitem__(self, key):
+        if key not in SERIES_KEYS:
+            return self.scalars[key]
+
+        # Keeping a reference to the views, since the pool can release the mapping from another thread.
+        series = self.__series
+        if series is None:
+            series = self.__map()
+        self.pool.touch(self)
+
+        return series[key]
+
+    def __contains__(self, key):
+        return key in SERIES_KEYS or key in self.scalars
+
+    def keys(self):
+        return list(self.scalars.keys()) + SERIES_KEYS
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def is_mapped(self):
+        """Returns True if the workout file is currently mapped into memory."""
+        return self.__series is not None
+
+    def release(self):
+        """
+        Releases the mapping of the workout file by closing the memory map, which also closes its handle to the file.
+        If arrays that were already handed out are still referenced the map cannot be closed, in which case they keep
+        the mapping alive until they are no longer referenced, after which the file is unmapped.
+        """
+        mapping = self.__mapping
+        self.__mapping = None
+        self.__series = None
+
+        if mapping is not None:
+            try:
+                mapping.close()
+            except BufferError:
+                pass
+
+    def __map(self):
+        """Maps the workout file into memory and creates the views of the data series, which are also returned."""
+        with open(self.path, "rb") as workout_file:
+            self.__mapping = mmap.mmap(workout_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        self.__series = decode_series(self.__mapping, self.offset, self.sample_count)
+
+        return self.__series
+
+
+class MappedWorkoutPool:
+    """
+    Pool that limits the amount of workouts that are memory-mapped at the same time. When a workout is accessed and the
+    pool is full, the mapping of the least recently accessed workout is released. This keeps the memory footprint of
+    the workout history constant no matter how many workouts are accessed. Workouts can be accessed from worker threads,
+    so changes to the pool are serialized with a lock.
+    """
+    def __init__(self, max_mapped=8):
+        """
+        Method called when a MappedWorkoutPool object is initialized.
+
+        :param max_mapped: The maximum amount of workouts that are mapped at the same time.
+        """
+        self.max_mapped = max_mapped
+
+        # Ordered dictionary with the mapped workouts, where the least recently accessed workout is first.
+        self.mapped = collections.OrderedDict()
+        self.lock = threading.Lock()
+
+    def open(self, path):
+        """Returns a MappedWorkout for the workout file at the given path, which is mapped on first access."""
+        return MappedWorkout(path, self)
+
+    def touch(self, workout):
+        """Marks the workout as the most recently accessed and releases the least recently accessed if necessary."""
+        with self.lock:
+            self.mapped[id(workout)] = workout
+            self.mapped.move_to_end(id(workout))
+
+            while len(self.mapped) > self.max_mapped:
+                self.mapped.popitem(last=False)[1].release()
+
+    def release_all(self):
+        """Releases the mapping of every workout in the pool, for example when the application is closed."""
+        with self.lock:
+            while self.mapped:
+                self.mapped.popitem(last=False)[1].release()
+
+
+def export_json(path, workout):
+    """
+    Exports the workout to the given path as a json file with a key-value pair for each attribute of the workout, where
+    each data series is a list.
+    """
+    workout = dict(workout)
+    for name in SERIES_KEYS:
+        if name in FLOAT_KEYS:
+            workout[name] = [round(float(value), 1) for value in workout[name]]
+        else:
+            workout[name] = [int(value) for value in workout[name]]
+
+    with open(path, "w", encoding="utf-8") as jsonfile:
+        json.dump(workout, jsonfile, ensure_ascii=False)
+
+
+def upgrade_workout(workout):
+    """
+    Upgrades a workout saved by an earlier version of the application, where the duration and the elapsed time of each
+    sample were saved as timestamps with the format "HH:MM:SS", so they are amounts of seconds instead. The start time
+    of the workout as a unix time is added if it is missing, and so are the histograms if the data series are given.
+
+    :param workout: A dictionary with a key-value pair for each attribute of the workout. This is modified in place.
+    :return: The upgraded workout.
+    """
+    if isinstance(workout.get("duration"), str):
+        workout["duration"] = timestamp_to_seconds(workout["duration"])
+
+    if len(workout.get("time", [])) != 0 and isinstance(workout["time"][0], str):
+        workout["time"] = [timestamp_to_seconds(timestamp) for timestamp in workout["time"]]
+
+    if "unix_time" not in workout and "date_time" in workout:
+        workout["unix_time"] = date_time_to_unix_time(workout["date_time"])
+
+    if "histograms" not in workout and "date_time" in workout and all(key in workout for key in SERIES_KEYS):
+        workout["histograms"] = histograms_from_series(workout)
+
+    return workout
+
+
+def date_time_to_unix_time(date_time):
+    """
+    Converts the date of a workout with the format "%d-%m-%Y %H:%M:%S" in local time into the equivalent unix time.
+    Since the format is fixed the fields are sliced directly from the string instead of using a general date parser.
+    """
+    return int(datetime.datetime(int(date_time[6:10]), int(date_time[3:5]), int(date_time[:2]), int(date_time[11:13]),
+                                 int(date_time[14:16]), int(date_time[17:19])).timestamp())
+
+
+def timestamp_to_seconds(timestamp):
+    """Converts a timestamp with the format "HH:MM:SS" into the equivalent amount of seconds."""
+    return int(timestamp[:2]) * 3600 + int(timestamp[3:5]) * 60 + int(timestamp[6:])
+
+
+def seconds_to_timestamp(seconds):
+    """Converts an amount of seconds into the equivalent timestamp with the format "HH:MM:SS"."""
+    return f"{seconds // 3600:02d}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
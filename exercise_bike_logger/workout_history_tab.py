@@ -1,32 +1,88 @@
+import numpy as np
 import pyqtgraph as pg
+from PyQt5 import QtCore, QtWidgets
+
+from exercise_bike_logger.histograms import percentiles, time_in_ranges
+from exercise_bike_logger.plot_cache import PlotArrayCache
+from exercise_bike_logger.plot_lod import min_max_pyramid, select_level
+from exercise_bike_logger.workout_file import seconds_to_timestamp
 
 
 class WorkoutHistoryTab:
     def __init__(self, main_window):
         self.main_window = main_window
 
+        # The plot arrays of the currently selected workout, which is the reference when several workouts are selected,
+        # and a list with the plot arrays of the other selected workouts, which are compared with the reference.
+        self.plot_arrays = None
+        self.compared_arrays = []
+
+        # The cache with the plot arrays of the recently selected workouts.
+        self.plot_cache = PlotArrayCache()
+
+        # List of tuples with the format (line, level-of-detail pyramid) with each plotted line.
+        self.plotted_lines = []
+
+        # Styling the graph and creating the plotted line once, after which the line is updated with the data of the
+        # selected workout. The color of the line is based on the index of the combo box to ensure each line is unique.
+        self.main_window.workoutGraphWidget.setBackground("#31363b")
+        self.pens = [pg.mkPen(color=color, width=2)
+                     for color in ["#4b6bc8", "#FFFF00", "#CD0000", "#008000", "#800080", "#FFA500", "#00FFD2"]]
+        self.curve = self.main_window.workoutGraphWidget.plot([], [], pen=self.pens[0])
+
+        # The lines of the compared workouts, which are created when more workouts are compared than ever before, and
+        # the line showing the difference between the most recently selected workout and the reference.
+        self.compared_curves = []
+        self.delta_curve = self.main_window.workoutGraphWidget.plot(
+            [], [], pen=pg.mkPen(color="#ffffff", width=1, style=QtCore.Qt.DashLine))
+        self.legend = self.main_window.workoutGraphWidget.addLegend()
+        self.legend_dates = []
+
+        # Allowing several workouts to be selected, with ctrl or shift, so they can be compared in the graph.
+        self.main_window.workoutListView.setSelectionMode(QtWidgets.QAbstractItemView.ExtendedSelection)
+
+        self.label_style = {'color': '#ffffff', 'font-size': '14pt'}
+        self.main_window.workoutGraphWidget.setLabel("bottom", "Minutes", **self.label_style)
+
         # When the selection is changed in the workout list view we update the display.
         self.main_window.workoutListView.selectionModel().selectionChanged.connect(self.update_display)
 
-        # Selecting the most recent workout initially.
-        self.main_window.workoutListView.setCurrentIndex(self.main_window.model.createIndex(0, 0))
+        # Selecting the most recent workout when the first workouts are added to the workout list.
+        self.main_window.model.rowsInserted.connect(self.select_first_workout)
 
         # Updating the graph when the graph combo box is changed.
         self.main_window.workoutGraphComboBox.currentIndexChanged.connect(self.update_graph)
 
+        # Choosing the level of detail of the plotted line again when the graph is zoomed or panned.
+        self.main_window.workoutGraphWidget.getViewBox().sigXRangeChanged.connect(self.update_level_of_detail)
+
+    def select_first_workout(self):
+        """Selects the most recent workout if no workout is currently selected."""
+        if len(self.main_window.workoutListView.selectedIndexes()) == 0:
+            self.main_window.workoutListView.setCurrentIndex(self.main_window.model.createIndex(0, 0))
+
     def update_display(self):
-        """Updates the display on the workout history tab with the data from the currently selected item."""
-        index = self.main_window.workoutListView.selectedIndexes()[0]
+        """
+        Updates the display on the workout history tab with the data from the currently selected item. If several
+        workouts are selected, the first selected workout is shown and the other workouts are compared with it in the
+        graph.
+        """
+        indexes = self.main_window.workoutListView.selectedIndexes()
+        index = indexes[0] if indexes else None
 
         if index:
-            # Getting a dictionary containing the data from the selected workout.
+            # Getting a dictionary containing the summary of the selected workout.
             workout = self.main_window.model.workouts[index.row()]
 
+            # Getting the plot arrays of the selected workouts, which only loads the data series if they are not cached.
+            self.plot_arrays = self.__plot_arrays(index.row())
+            self.compared_arrays = [self.__plot_arrays(compared_index.row()) for compared_index in indexes[1:]]
+
             # Setting the labels of the display to the corresponding data from the workout.
             self.main_window.dateLabel.setText(workout["date_time"])
             self.main_window.programLabel.setText(workout["program_name"])
             self.main_window.levelLabel.setText(str(workout["program_level"]))
-            self.main_window.durationLabel.setText(str(workout["duration"]))
+            self.main_window.durationLabel.setText(seconds_to_timestamp(workout["duration"]))
             self.main_window.distanceLabel.setText(f"{workout['total_distance']} km")
             self.main_window.caloriesLabel.setText(str(workout["total_calories"]))
             self.main_window.avgSpeedLabel.setText(f"{workout['avg_speed']} km/h")
@@ -38,36 +94,121 @@ class WorkoutHistoryTab:
             self.main_window.maxHeartRateLabel.setText(str(workout["max_heart_rate"]))
             self.main_window.maxWattLabel.setText(str(workout["max_watt"]))
 
+            self.update_distributions(workout)
             self.update_graph()
 
-    def update_graph(self):
-        """Updating the graph with data from the current configuration."""
-        index = self.main_window.workoutListView.selectedIndexes()[0]
-
-        if index:
-            # Getting a dictionary containing the data from the selected workout.
-            workout = self.main_window.model.workouts[index.row()]
+    def update_distributions(self, workout):
+        """
+        Updates the tooltips of the average labels with the percentiles of the data series of the workout, and the
+        tooltip of the average watt label with the time spent within each 50 watt range. The percentiles are found
+        from the histograms in the summary, so the data series are not needed.
 
-            # Getting the specific data that should be plotted from the graph combo box.
-            data_name = self.main_window.workoutGraphComboBox.currentText()
+        :param workout: A dictionary containing the summary of the workout.
+        """
+        histograms = workout["histograms"]
+        labels = {"speed": self.main_window.avgSpeedLabel, "rpm": self.main_window.avgRPMLabel,
+                  "heart_rate": self.main_window.avgHeartRateLabel, "watt": self.main_window.avgWattLabel}
 
-            # Converting the timestamps into minutes and using them as the x-coordinate.
-            x = [self.main_window.timestamp_to_seconds(timestamp) / 60 for timestamp in workout["time"]]
+        for key, label in labels.items():
+            lines = []
 
-            # Initializing the y-coordinates.
-            y = workout[data_name.lower().replace(" ", "_")]
+            median, p90, p99 = percentiles(histograms, key)
+            if median is not None:
+                lines.extend([f"Median: {median}", f"90th percentile: {p90}", f"99th percentile: {p99}"])
 
-            self.main_window.workoutGraphWidget.clear()
+            if key == "watt":
+                lines.extend(f"{start}-{start + 50} W: {seconds_to_timestamp(seconds)}"
+                             for start, seconds in time_in_ranges(histograms, key, 50))
 
-            self.main_window.workoutGraphWidget.setBackground("#31363b")
+            label.setToolTip("\n".join(lines))
 
-            # Choosing the color of the line based on the index of the combo box to ensure each line is unique.
-            colors = ["#4b6bc8", "#FFFF00", "#CD0000", "#008000", "#800080", "#FFA500", "#00FFD2"]
-            line_color = colors[self.main_window.workoutGraphComboBox.currentIndex()]
-
-            # Plotting the content in the graph, including the line and label names.
-            self.main_window.workoutGraphWidget.plot(x, y, pen=pg.mkPen(color=line_color, width=2), name=data_name)
+    def update_graph(self):
+        """Updating the graph with data from the current configuration."""
+        if self.plot_arrays is not None:
+            # Getting the specific data that should be plotted from the graph combo box.
+            data_name = self.main_window.workoutGraphComboBox.currentText()
 
-            label_style = {'color': '#ffffff', 'font-size': '14pt'}
-            self.main_window.workoutGraphWidget.setLabel("bottom", "Minutes", **label_style)
-            self.main_window.workoutGraphWidget.setLabel("left", data_name, **label_style)
+            key = data_name.lower().replace(" ", "_")
+
+            # The lines are plotted with the level of detail of the data series that fits the width of the graph, with
+            # the elapsed minutes as the x-coordinates, so the workouts are aligned by the elapsed time.
+            self.plotted_lines = [(self.curve, self.plot_arrays["pyramids"][key])]
+            self.curve.setPen(self.pens[self.main_window.workoutGraphComboBox.currentIndex()])
+
+            # Creating the lines of the compared workouts that are missing.
+            while len(self.compared_curves) < len(self.compared_arrays):
+                self.compared_curves.append(self.main_window.workoutGraphWidget.plot([], []))
+
+            for i, (curve, arrays) in enumerate(zip(self.compared_curves, self.compared_arrays)):
+                curve.setPen(pg.mkPen(color=pg.intColor(i, hues=max(len(self.compared_arrays), 2)), width=1))
+                self.plotted_lines.append((curve, arrays["pyramids"][key]))
+
+            if self.compared_arrays:
+                self.plotted_lines.append((self.delta_curve, self.__delta_pyramid(self.compared_arrays[-1], key)))
+
+            # Hiding the lines that are not used.
+            for curve in self.compared_curves[len(self.compared_arrays):] + [self.delta_curve]:
+                curve.setData([], [])
+
+            self.update_level_of_detail()
+            self.update_legend()
+            self.main_window.workoutGraphWidget.setLabel("left", data_name, **self.label_style)
+
+    def update_legend(self):
+        """
+        Shows the date of each plotted workout in the legend when several workouts are compared. The legend is only
+        created again when the compared workouts are changed.
+        """
+        dates = [self.main_window.model.workouts[index.row()]["date_time"]
+                 for index in self.main_window.workoutListView.selectedIndexes()] if self.compared_arrays else []
+        if dates == self.legend_dates:
+            return
+
+        self.legend_dates = dates
+        self.legend.clear()
+        self.legend.setVisible(bool(dates))
+
+        for (curve, pyramid), date in zip(self.plotted_lines, dates):
+            self.legend.addItem(curve, date)
+        if dates:
+            self.legend.addItem(self.delta_curve, f"Difference ({dates[-1]} - {dates[0]})")
+
+    def update_level_of_detail(self):
+        """Plots the level of detail of each data series that fits the visible part of the graph."""
+        for curve, pyramid in self.plotted_lines:
+            curve.setData(*self.__visible_points(pyramid))
+
+    def __plot_arrays(self, row):
+        """Helper method used to get the plot arrays of the workout in the given row from the plot array cache."""
+        return self.plot_cache.get(self.main_window.model.workouts[row]["id"],
+                                   lambda: self.main_window.model.load_workout(row))
+
+    def __delta_pyramid(self, arrays, key):
+        """
+        Helper method used to create the level-of-detail pyramid of the difference between the data series of the
+        compared workout and the reference, aligned by the elapsed seconds. The difference only covers the seconds that
+        both workouts contain.
+        """
+        seconds = self.plot_arrays["time"]
+        seconds = seconds[seconds <= arrays["time"][-1]] if len(arrays["time"]) else seconds[:0]
+
+        compared = np.interp(seconds, arrays["time"], arrays[key]) if len(seconds) else np.empty(0)
+        delta = compared - self.plot_arrays[key][:len(seconds)]
+
+        return min_max_pyramid(self.plot_arrays["minutes"][:len(seconds)], delta)
+
+    def __visible_points(self, pyramid):
+        """
+        Helper method used to find the points of the level of detail that has at most two points per pixel within the
+        visible part of the graph. While the graph is automatically scaled the entire data series is visible.
+        """
+        view_box = self.main_window.workoutGraphWidget.getViewBox()
+        pixels = max(int(view_box.width()), 1)
+
+        # Using the entire data series while the x-axis is scaled automatically, since the automatic range would
+        # otherwise follow the points that are cut away.
+        if view_box.autoRangeEnabled()[0]:
+            return select_level(pyramid, -np.inf, np.inf, pixels)
+
+        x_min, x_max = view_box.viewRange()[0]
+        return select_level(pyramid, x_min, x_max, pixels)
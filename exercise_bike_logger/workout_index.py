@@ -0,0 +1,366 @@
+"""
+Module containing the summary index of the workout history. The index is a single compact file with one line per
+workout that only contains the scalar attributes of the workout, meaning that the workout history can be listed and
+processed without parsing the per-second data series of every single workout. The lines are sorted by the start time,
+the most recent first, and only the position, modification time and hash of each line are kept in memory, so a page of
+summaries is read from the file when the workout list needs it. New workouts are appended to a journal next to the
+index, so saving a workout does not rewrite the entire index. The journal is merged into the index when the index is
+refreshed.
+
+Workouts are saved in the binary columnar format defined in the workout_file module with the ".workout" extension.
+Workouts saved as ".json" files by earlier versions of the application are still supported.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import threading
+
+from exercise_bike_logger import workout_file
+
+# The version of the index format. If the saved index has a different version it is rebuilt from the workout files.
+INDEX_VERSION = 1
+
+# The attributes of a workout that are saved in the summary index.
+SUMMARY_KEYS = ["date_time", "unix_time", "program_name", "program_level", "duration", "total_distance",
+                "total_calories", "avg_speed", "avg_rpm", "avg_heart_rate", "avg_watt", "max_speed", "max_rpm",
+                "max_heart_rate", "max_watt", "histograms"]
+
+
+def summary_hash(summary):
+    """
+    Computes a signed 64-bit hash of the id and the attributes of a workout summary, which fits in an SQLite integer.
+    The hashes of the workouts are summed into the fingerprint of the workout history, so a workout that is replaced by
+    a different workout with the same id changes the fingerprint even though the ids are the same.
+
+    :param summary: A dictionary containing the summary of the workout, including the id.
+    :return: The hash as an integer.
+    """
+    content = json.dumps([str(summary["id"])] + [summary[key] for key in SUMMARY_KEYS], sort_keys=True)
+
+    return int.from_bytes(hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest(), "little", signed=True)
+
+
+class WorkoutIndex:
+    """
+    This class maintains the summary index of the workouts in the workout directory. The index is rebuilt automatically
+    when it is missing or stale, where stale means that a workout file has been added, removed or changed since the
+    index was saved. Only the workout files that are not already correctly indexed are parsed when rebuilding. The index
+    is used by the GUI thread and the worker threads, so access is serialized with a lock.
+    """
+    def __init__(self, workout_directory="../data/workouts", index_path="../data/workout_index.json", parallel=False):
+        """
+        Method called when a WorkoutIndex object is initialized.
+
+        :param workout_directory: The directory containing a file for each workout.
+        :param index_path: The path of the file in which the summary index is saved. The journal of the index is saved
+        in the same path with the ".journal" extension added.
+        :param parallel: If True, the workout files that need to be indexed are parsed in parallel by a process pool.
+        This only speeds up indexing json files saved by earlier versions of the application, since only the header of a
+        ".workout" file is read.
+        """
+        self.workout_directory = workout_directory
+        self.index_path = index_path
+        self.journal_path = f"{index_path}.journal"
+        self.parallel = parallel
+        self.lock = threading.Lock()
+
+        # Dictionary with a key-value pair for each workout where the key is the workout id and the value is a tuple
+        # with the format (position of the line in the index file, modification time, summary hash). The position is
+        # None if the summary is not in the index file yet. This is None until the index is loaded.
+        self.entries = None
+
+        # Dictionary with the summaries that are not in the index file yet, which are the workouts added since the index
+        # file was saved.
+        self.added = {}
+
+    def refresh(self):
+        """
+        Loads the summary index, updating it first if it is missing or stale.
+
+        :return: A list with the id of each workout, the most recent first.
+        """
+        with self.lock:
+            self.__refresh()
+
+            return self.__sorted_ids()
+
+    def summary_hashes(self):
+        """Returns a dictionary with the summary hash of each workout, loading the index if necessary."""
+        with self.lock:
+            self.__ensure_loaded()
+
+            return {workout_id: entry[2] for workout_id, entry in self.entries.items()}
+
+    def load_summaries(self):
+        """
+        Reads the summary of every workout from the index, loading the index if necessary.
+
+        :return: A list of dictionaries where each dictionary is the summary of a workout, with the most recent first.
+        """
+        with self.lock:
+            self.__ensure_loaded()
+
+            return self.__read_summaries(self.__sorted_ids())
+
+    def load_summaries_by_ids(self, workout_ids):
+        """Reads the summaries of the workouts with the given ids from the index, in the order of the ids."""
+        with self.lock:
+            self.__ensure_loaded()
+
+            return self.__read_summaries(workout_ids)
+
+    def load_workout(self, workout_id):
+        """
+        Loads the complete workout, including the data series, from the workout file with the given id.
+
+        :param workout_id: The id of the workout, which is the unix time the workout was started.
+        :return: A dictionary with a key-value pair for each attribute of the workout.
+        """
+        path = self.workout_path(workout_id)
+        if path.endswith(".workout"):
+            return workout_file.read_workout(path)
+
+        with open(path, "r") as jsonfile:
+            return workout_file.upgrade_workout(json.load(jsonfile))
+
+    def workout_path(self, workout_id):
+        """Returns the path of the file containing the workout with the given id."""
+        path = f"{self.workout_directory}/{workout_id}.workout"
+
+        return path if os.path.exists(path) else f"{self.workout_directory}/{workout_id}.json"
+
+    def add(self, workout_id, workout):
+        """
+        Adds a single workout to the index and appends its summary to the journal. Only the new summary is written, so
+        the time it takes does not depend on the size of the workout history.
+
+        :param workout_id: The id of the workout, which is the unix time the workout was started.
+        :param workout: A dictionary containing the attributes of the workout.
+        :return: The summary of the workout that was added to the index.
+        """
+        mtime = os.stat(self.workout_path(workout_id)).st_mtime
+        summary = self.summarize(workout_id, workout, mtime)
+
+        with self.lock:
+            # Each line in the journal is a single summary together with the index version. The index might not be
+            # loaded yet, for example when unfinished sessions are recovered at startup, in which case the summary is
+            # merged from the journal when the index is loaded.
+            with open(self.journal_path, "a", encoding="utf-8") as journal_file:
+                journal_file.write(json.dumps({"version": INDEX_VERSION, "summary": summary},
+                                              ensure_ascii=False) + "\n")
+
+            if self.entries is not None:
+                self.added[workout_id] = summary
+                self.entries[workout_id] = (None, mtime, summary_hash(summary))
+
+        return summary
+
+    @staticmethod
+    def summarize(workout_id, workout, mtime):
+        """
+        Extracts the scalar attributes of a workout into a summary.
+
+        :param workout_id: The id of the workout, which is the unix time the workout was started.
+        :param workout: A dictionary containing the attributes of the workout.
+        :param mtime: The modification time of the workout file, used to detect when the summary is stale.
+        :return: A dictionary containing the id, the modification time and the scalar attributes of the workout.
+        """
+        summary = {key: workout[key] for key in SUMMARY_KEYS}
+        summary["id"] = workout_id
+        summary["mtime"] = mtime
+
+        return summary
+
+    def __ensure_loaded(self):
+        """Helper method used to load the index the first time it is used."""
+        if self.entries is None:
+            self.__refresh()
+
+    def __refresh(self):
+        """Helper method used to load the summary index and update it if it is missing or stale."""
+        self.entries = self.__read_index()
+
+        # Merging the journaled workouts into the index, which requires the index to be saved.
+        self.added = self.__read_journal()
+        for workout_id, summary in self.added.items():
+            self.entries[workout_id] = (None, summary["mtime"], summary_hash(summary))
+
+        # Going through the workout files and finding the files that are not already correctly indexed.
+        workout_files = set()
+        unindexed = []
+        with os.scandir(self.workout_directory) as entries:
+            for entry in entries:
+                workout_id, extension = os.path.splitext(entry.name)
+                if extension not in (".workout", ".json"):
+                    continue
+
+                mtime = entry.stat().st_mtime
+                workout_files.add(workout_id)
+
+                if workout_id not in self.entries or self.entries[workout_id][1] != mtime:
+                    unindexed.append((workout_id, entry.path, mtime))
+
+        # Parsing the files that are not indexed in chronological order, so the result is the same in both modes.
+        unindexed.sort(key=lambda file: int(file[0]))
+        paths = [path for workout_id, path, mtime in unindexed]
+        scalars = load_scalars_parallel(paths) if self.parallel else [load_scalars(path) for path in paths]
+
+        for (workout_id, path, mtime), workout in zip(unindexed, scalars):
+            self.added[workout_id] = self.summarize(workout_id, workout, mtime)
+            self.entries[workout_id] = (None, mtime, summary_hash(self.added[workout_id]))
+        changed = len(self.added) > 0
+
+        # Removing the summaries of workouts that no longer exist.
+        for workout_id in list(self.entries.keys()):
+            if workout_id not in workout_files:
+                del self.entries[workout_id]
+                self.added.pop(workout_id, None)
+                changed = True
+
+        if changed:
+            self.__save()
+
+    def __save(self):
+        """
+        Helper method used to save the summary index to the index file and remove the journal, since it is contained in
+        the index. The summaries already in the index file are copied line by line, so the index is never held in
+        memory. The index is written to a temporary file first, so the saved index is never incomplete.
+        """
+        workout_ids = self.__sorted_ids()
+        temporary_path = f"{self.index_path}.tmp"
+        entries = {}
+
+        with open(temporary_path, "wb") as index_file:
+            index_file.write(json.dumps({"version": INDEX_VERSION}).encode("utf-8") + b"\n")
+
+            old_file = open(self.index_path, "rb") if len(self.added) < len(workout_ids) else None
+            try:
+                for workout_id in workout_ids:
+                    position, mtime, hash_value = self.entries[workout_id]
+                    if position is None:
+                        summary = json.dumps(self.added[workout_id], ensure_ascii=False)
+                        line = f"{workout_id}\t{mtime!r}\t{hash_value}\t{summary}\n".encode("utf-8")
+                    else:
+                        old_file.seek(position)
+                        line = old_file.readline()
+
+                    entries[workout_id] = (index_file.tell(), mtime, hash_value)
+                    index_file.write(line)
+            finally:
+                if old_file is not None:
+                    old_file.close()
+
+        os.replace(temporary_path, self.index_path)
+        self.entries = entries
+        self.added = {}
+
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+    def __sorted_ids(self):
+        """Helper method used to sort the workout ids by the start time, the most recent first."""
+        return sorted(self.entries, key=int, reverse=True)
+
+    def __read_summaries(self, workout_ids):
+        """Helper method used to read the summaries of the given workouts from the index file or the added summaries."""
+        if all(self.entries[workout_id][0] is None for workout_id in workout_ids):
+            return [self.added[workout_id] for workout_id in workout_ids]
+
+        summaries = []
+        with open(self.index_path, "rb") as index_file:
+            for workout_id in workout_ids:
+                position = self.entries[workout_id][0]
+                if position is None:
+                    summaries.append(self.added[workout_id])
+                else:
+                    index_file.seek(position)
+                    summaries.append(json.loads(index_file.readline().split(b"\t", 3)[3]))
+
+        return summaries
+
+    def __read_index(self):
+        """
+        Reads the position, modification time and hash of each line in the index file, returning an empty index if it
+        is missing or outdated. Each line has the format "id, modification time, hash, summary" separated by tabs, so
+        the summaries are not parsed.
+        """
+        entries = {}
+        try:
+            with open(self.index_path, "rb") as index_file:
+                header = index_file.readline()
+                if json.loads(header).get("version") != INDEX_VERSION:
+                    return {}
+
+                position = len(header)
+                for line in index_file:
+                    workout_id, mtime, hash_value, summary = line.split(b"\t", 3)
+                    entries[workout_id.decode("utf-8")] = (position, float(mtime), int(hash_value))
+                    position += len(line)
+        except (OSError, ValueError, AttributeError):
+            return {}
+
+        return entries
+
+    def __read_journal(self):
+        """Reads the summaries of the workouts that were added since the index file was saved."""
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as journal_file:
+                lines = journal_file.readlines()
+        except OSError:
+            return {}
+
+        summaries = {}
+        for line in lines:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # The last line is incomplete if the application crashed while writing it. The workout file is indexed
+                # again when the index is loaded since it has no summary.
+                continue
+
+            if entry.get("version") == INDEX_VERSION:
+                summaries[entry["summary"]["id"]] = entry["summary"]
+
+        return summaries
+
+
+def load_scalars(path):
+    """
+    Loads the scalar attributes of the workout in the given file that are saved in the summary index. The data series
+    are only parsed if the workout is saved as a json file.
+    """
+    if path.endswith(".workout"):
+        workout = workout_file.read_scalars(path)
+    else:
+        with open(path, "r") as jsonfile:
+            workout = workout_file.upgrade_workout(json.load(jsonfile))
+
+    return {key: workout[key] for key in SUMMARY_KEYS}
+
+
+def load_scalars_chunk(paths):
+    """Loads the scalar attributes of each workout file in the chunk. This is the function run by the process pool."""
+    return [load_scalars(path) for path in paths]
+
+
+def load_scalars_parallel(paths, max_workers=None, chunk_size=64):
+    """
+    Loads the scalar attributes of each workout file by splitting the files into chunks and parsing the chunks in
+    parallel processes. Only the scalar attributes are sent back from the workers, so the data series are never
+    transferred between processes. This only pays off for json files, which are parsed completely, on a machine with
+    several processors.
+
+    :param paths: The paths of the workout files.
+    :param max_workers: The maximum amount of workers. If None, the amount of processors is used.
+    :param chunk_size: The amount of files parsed by a worker in each task.
+    :return: A list with the scalar attributes of each workout, in the same order as the given paths.
+    """
+    if len(paths) <= chunk_size:
+        return load_scalars_chunk(paths)
+
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Since map returns the results in the order of the chunks, the merged result is deterministic.
+        return [scalars for chunk in executor.map(load_scalars_chunk, chunks) for scalars in chunk]
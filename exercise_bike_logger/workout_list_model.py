@@ -1,17 +1,45 @@
-import json
-import os
+import time
 
 from PyQt5 import QtCore
 from PyQt5.QtCore import Qt
 
 
 class WorkoutListModel(QtCore.QAbstractListModel):
-    def __init__(self):
+    def __init__(self, store):
+        """
+        Method called when the workout list model is initialized.
+
+        :param store: The storage backend that the workouts are loaded from.
+        """
         super(WorkoutListModel, self).__init__()
 
-        # The list that will contain a dictionary for each workout with a key-value pair for each attribute.
+        # The storage backend, which is used to load the workout summaries without parsing the data series of each
+        # workout.
+        self.store = store
+
+        # The sorted index of the workout history, which is a list with the id of each workout, the most recent first.
+        self.workout_ids = []
+
+        # Dictionary with the position of each workout id, which is used to find the row of a workout without searching
+        # the sorted index. New workouts are inserted at the top, so the positions count upwards from the oldest workout
+        # and the row of a workout is the position of the most recent workout minus the position of the workout. This
+        # means that the positions never change when a workout is inserted.
+        self.positions = {}
+        self.top_position = -1
+
+        # Dictionary with the ids of the workouts of each date, the most recent first, with the date in the format
+        # "dd-mm-yyyy" as the key. It is created the first time it is used.
+        self.date_index = None
+
+        # The list that will contain a summary dictionary for each fetched workout with a key-value pair for each scalar
+        # attribute. The summaries are fetched a page at a time, in the order of the workout ids, when the view needs
+        # them. The data series of a workout are only loaded when needed using load_workout().
         self.workouts = []
 
+        # The amount of workouts that are fetched each time the view needs more rows. This covers the visible rows and
+        # a prefetch window below them.
+        self.page_size = 50
+
     def data(self, QModelIndex, role=None):
         """
         Returns the data stored under the given role for the item referred to by the index.
@@ -29,18 +57,98 @@ class WorkoutListModel(QtCore.QAbstractListModel):
 
     def rowCount(self, parent=None, *args, **kwargs):
         """
-        Simple function that returns the total rowcount of the internal model representation. Since we use a list this
-        is simply the length of the list.
+        Simple function that returns the total rowcount of the internal model representation. Since only the fetched
+        workouts are rows in the model this is the length of the list of fetched workouts.
         """
         return len(self.workouts)
 
-    def load_workouts(self):
-        """Loading the workouts from the json files in the "workouts" folder into the internal model."""
-        self.workouts.clear()
+    def canFetchMore(self, parent=None):
+        """Returns True if there are workouts in the sorted index that are not yet fetched."""
+        return len(self.workouts) < len(self.workout_ids)
+
+    def fetchMore(self, parent=None):
+        """Fetching the summaries of the next page of workouts from the storage backend and appending them as rows."""
+        start = len(self.workouts)
+        end = min(start + self.page_size, len(self.workout_ids))
+        if start == end:
+            return
 
-        for filename in os.listdir("../data/workouts"):
-            with open(f"../data/workouts/{filename}", "r") as jsonfile:
-                self.workouts.append(json.load(jsonfile))
+        summaries = self.store.load_summaries_by_ids(self.workout_ids[start:end])
+
+        self.beginInsertRows(QtCore.QModelIndex(), start, end - 1)
+        self.workouts.extend(summaries)
+        self.endInsertRows()
+
+    def set_workout_ids(self, workout_ids):
+        """
+        Replacing the sorted index of the workout history. The summaries are then fetched a page at a time.
+
+        :param workout_ids: A list with the id of each workout, the most recent first.
+        """
+        self.beginResetModel()
+        self.workout_ids = workout_ids
+        self.workouts = []
+        self.positions = {workout_id: len(workout_ids) - 1 - row for row, workout_id in enumerate(workout_ids)}
+        self.top_position = len(workout_ids) - 1
+        self.date_index = None
+        self.endResetModel()
+
+        # Fetching the first page so the most recent workouts are shown immediately.
+        self.fetchMore()
+
+    def row_of_workout(self, workout_id):
+        """
+        Returns the row of the workout with the given id, fetching the pages up to the row if necessary.
+
+        :param workout_id: The id of the workout.
+        :return: The row of the workout in the internal model.
+        """
+        row = self.top_position - self.positions[workout_id]
+        while row >= len(self.workouts):
+            self.fetchMore()
+
+        return row
+
+    def rows_of_date(self, date):
+        """
+        Returns the rows of the workouts completed on the given date, fetching the pages up to the rows if necessary.
+
+        :param date: The date in the format "dd-mm-yyyy".
+        :return: A list with the row of each workout on the date, the most recent first.
+        """
+        if self.date_index is None:
+            self.date_index = {}
+            for workout_id in self.workout_ids:
+                self.date_index.setdefault(self.__date_of_workout(workout_id), []).append(workout_id)
+
+        return [self.row_of_workout(workout_id) for workout_id in self.date_index.get(date, [])]
+
+    def add_workout(self, workout):
+        """
+        Inserting a single new workout at the top of the internal model.
+
+        :param workout: A dictionary containing the summary of the new workout.
+        """
+        self.beginInsertRows(QtCore.QModelIndex(), 0, 0)
+        self.workout_ids.insert(0, workout["id"])
+        self.workouts.insert(0, workout)
+
+        self.top_position += 1
+        self.positions[workout["id"]] = self.top_position
+        if self.date_index is not None:
+            self.date_index.setdefault(self.__date_of_workout(workout["id"]), []).insert(0, workout["id"])
+        self.endInsertRows()
+
+    def load_workout(self, row):
+        """
+        Loading the complete workout, including the data series, for the workout in the given row.
+
+        :param row: The row of the workout in the internal model.
+        :return: A dictionary with a key-value pair for each attribute of the workout.
+        """
+        return self.store.load_workout(self.workouts[row]["id"])
 
-        # Reversing the list so the most recent workout is first.
-        self.workouts.reverse()
+    @staticmethod
+    def __date_of_workout(workout_id):
+        """Helper method used to find the date of a workout from the id, which is the unix time the workout started."""
+        return time.strftime("%d-%m-%Y", time.localtime(int(workout_id)))
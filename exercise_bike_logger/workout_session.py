@@ -1,26 +1,38 @@
-import json
+import os
 import statistics
 from datetime import datetime
 
+from exercise_bike_logger.histograms import empty_histograms, add_value, HISTOGRAM_BINS
+from exercise_bike_logger.session_log import SessionLog, read_log, find_unfinished_logs
+from exercise_bike_logger.workout_file import SERIES_KEYS
+from exercise_bike_logger.workout_index import SUMMARY_KEYS
+from exercise_bike_logger.workout_program import WorkoutProgram
+
 
 class WorkoutSession:
     """
     This class describes a single workout session. Data from the exercise bike can be processed and saved. When the
-    session is done the data can be saved to a file and further information can be extracted and saved separately.
+    session is done the data can be saved with the storage backend and further information can be extracted.
     """
-    def __init__(self, program, unix_time, main_window):
+    def __init__(self, program, unix_time, main_window, log_directory="../data/sessions"):
         """
         Method called when a WorkoutSession instance is initialized.
 
         :param program: The workout program containing the level, duration and level changes of the workout.
-        :param unix_time: The name of the json file in which the processed data should be saved.
+        :param unix_time: The unix time the session was started, which is used as the id of the saved workout.
         :param main_window: The main window instance which is used to update the main window when the workout is done.
+        :param log_directory: The directory that the session log is written to while the session is ongoing. If None,
+        no session log is written.
         """
         self.program = program
         self.unix_time = unix_time
         self.main_window = main_window
+        self.log_directory = log_directory
+
+        # The append-only log that each sample is written to, so the session can be recovered after a crash.
+        self.log = None
 
-        # Initializing the instance attributes that are going to be saved to the json file.
+        # Initializing the instance attributes that are going to be saved with the storage backend.
         self.date_time = datetime.fromtimestamp(int(self.unix_time)).strftime('%d-%m-%Y %H:%M:%S')
         self.program_name = program.program_name
         self.program_level = program.level
@@ -44,6 +56,9 @@ class WorkoutSession:
         self.watt = []
         self.level = []
 
+        # The histograms of the speed, rpm, heart rate and watt, which are built as the samples are added.
+        self.histograms = empty_histograms()
+
     def process_read_response(self, data, display_updater):
         """
         Processing the response from the READ write operation and saving the processed data to the instance.
@@ -54,31 +69,75 @@ class WorkoutSession:
         # Doing necessary data preprocessing.
         data = [element - 1 for element in data]
 
-        # Adding each element of data from the READ response to the corresponding instance attributes.
-        self.time.append(f"{data[3]:02d}:{data[4]:02d}:{data[5]:02d}")
-
-        self.speed.append(round(((100 * (data[6]) + data[7]) / 10.0), 1))
+        # Extracting each element of data from the READ response and adding the sample to the session.
+        self.add_sample((data[3] * 3600 + data[4] * 60 + data[5],
+                         round(((100 * (data[6]) + data[7]) / 10.0), 1),
+                         (100 * (data[8]) + data[9]),
+                         round(((100 * (data[10]) + data[11]) / 10.0), 1),
+                         (100 * (data[12]) + data[13]),
+                         (100 * (data[14]) + data[15]),
+                         round(((100 * (data[16]) + data[17]) / 10.0), 1),
+                         data[18]))
 
-        self.rpm.append((100 * (data[8]) + data[9]))
-
-        self.distance.append(round(((100 * (data[10]) + data[11]) / 10.0), 1))
+        # Updating the display widgets on the live workout page.
+        display_updater(self.time[-1], self.speed[-1], self.rpm[-1], self.distance[-1], self.calories[-1],
+                        self.heart_rate[-1], self.watt[-1])
 
-        self.calories.append((100 * (data[12]) + data[13]))
+    def add_sample(self, sample):
+        """
+        Adding a single sample to the corresponding instance attributes and appending it to the session log.
 
-        self.heart_rate.append((100 * (data[14]) + data[15]))
+        :param sample: A tuple with the format (elapsed seconds, speed, rpm, distance, calories, heart rate, watt,
+        level).
+        """
+        seconds, speed, rpm, distance, calories, heart_rate, watt, level = sample
+
+        self.time.append(seconds)
+        self.speed.append(speed)
+        self.rpm.append(rpm)
+        self.distance.append(distance)
+        self.calories.append(calories)
+        self.heart_rate.append(heart_rate)
+        self.watt.append(watt)
+        self.level.append(level)
+
+        for key in HISTOGRAM_BINS:
+            add_value(self.histograms, key, getattr(self, key)[-1])
+
+        # Creating the session log when the first sample is added, so sessions without data do not leave a log behind.
+        if self.log is None and self.log_directory is not None:
+            self.log = SessionLog(f"{self.log_directory}/{self.unix_time}.log",
+                                  {"unix_time": self.unix_time, "program_name": self.program.program_name,
+                                   "program_level": self.program.level, "program_duration": self.program.duration})
+        if self.log is not None:
+            self.log.append(sample)
 
-        self.watt.append(round(((100 * (data[16]) + data[17]) / 10.0), 1))
+    def process_workout_session(self):
+        """
+        Processing the data from the workout session, saving it with the storage backend and updating the main window
+        with the new workout. The session log is deleted when the workout is saved.
+        """
+        summary = self.save(self.main_window.store)
+        self.discard_log()
 
-        self.level.append(data[18])
+        # Handing the summary of the saved workout directly to the main window, so the workout history and statistics
+        # tabs can be updated without loading the workout history again. This is run in the thread of the bluetooth
+        # session, so the summary is sent with a signal that adds the workout in the GUI thread.
+        self.main_window.workout_saved.emit(summary)
 
-        # Updating the display widgets on the live workout page.
-        display_updater(self.time[-1], self.speed[-1], self.rpm[-1], self.distance[-1], self.calories[-1],
-                        self.heart_rate[-1], self.watt[-1])
+    def discard_log(self):
+        """Deleting the session log. This is called when the session is saved or when it is stopped prematurely."""
+        if self.log is not None:
+            self.log.discard()
+            self.log = None
 
-    def process_workout_session(self):
+    def save(self, store):
         """
-        Processing the data from the workout session, extracting information about the data and saving it to an unique
-        json file.
+        Extracting information about the data from the workout session and saving the session with the storage
+        backend.
+
+        :param store: The storage backend that the workout is saved with.
+        :return: The summary of the saved workout.
         """
         # Adding the simple elements duration, distance and calories that are extracted by looking at the last element.
         self.duration = self.time[-1]
@@ -97,16 +156,43 @@ class WorkoutSession:
         self.max_heart_rate = max(self.heart_rate)
         self.max_watt = max(self.watt)
 
-        # Serializing the session to save it for later use.
-        with open(f"../data/workouts/{self.unix_time}.json", "w+", encoding='utf-8') as jsonfile:
-            # Getting the instance as a dictionary and removing the attributes that we do not want to save.
-            session_dict = self.__dict__.copy()
-            del session_dict["program"]
-            del session_dict["unix_time"]
-            del session_dict["main_window"]
+        # Getting the attributes of the instance that we want to save as a dictionary.
+        session_dict = {key: getattr(self, key) for key in SUMMARY_KEYS + SERIES_KEYS if key != "unix_time"}
+
+        # Saving the start time as a number so the date of the workout never has to be parsed from the date string.
+        session_dict["unix_time"] = int(self.unix_time)
+
+        return store.save_workout(self.unix_time, session_dict)
+
+
+def recover_sessions(store, log_directory="../data/sessions"):
+    """
+    Recovers the workouts of the sessions that were not finished, for example because the application crashed, by
+    saving the samples in each session log as a normal workout.
+
+    :param store: The storage backend that the recovered workouts are saved with.
+    :param log_directory: The directory containing the session logs.
+    :return: The summaries of the recovered workouts.
+    """
+    summaries = []
+    for path in find_unfinished_logs(log_directory):
+        try:
+            header, samples = read_log(path)
+        except ValueError:
+            # The header was not completely written, meaning that the session did not contain any samples.
+            header, samples = None, []
+
+        if len(samples) != 0:
+            program = WorkoutProgram(header["program_level"], header["program_duration"], header["program_name"])
+            session = WorkoutSession(program, header["unix_time"], None, log_directory=None)
+
+            # The floating point values are saved with single precision in the log, so they are rounded again.
+            for seconds, speed, rpm, distance, calories, heart_rate, watt, level in samples:
+                session.add_sample((seconds, round(speed, 1), rpm, round(distance, 1), calories, heart_rate,
+                                    round(watt, 1), level))
+
+            summaries.append(session.save(store))
 
-            # Saving the remaining attributes to the json file.
-            json.dump(session_dict, jsonfile, ensure_ascii=False)
+        os.remove(path)
 
-        # The workout history and statistics tabs are updated since a new workout is added to the data.
-        self.main_window.update_window()
+    return summaries
@@ -0,0 +1,373 @@
+"""
+Module containing the storage backends of the workout history. Each backend implements the interface defined by the
+WorkoutStore class, meaning that the rest of the application can load, save and query workouts without knowing how
+the workouts are stored.
+"""
+import abc
+import json
+import os
+import sqlite3
+import threading
+
+from exercise_bike_logger import workout_file
+from exercise_bike_logger.workout_file import SERIES_KEYS
+from exercise_bike_logger.workout_index import WorkoutIndex, SUMMARY_KEYS, summary_hash
+from exercise_bike_logger.summary_table import SummaryTable
+
+# The version of the SQLite database schema, which is saved in the "user_version" of the database.
+SCHEMA_VERSION = 1
+
+# The columns of the "workouts" table.
+WORKOUTS_COLUMNS = "id INTEGER PRIMARY KEY, date_time TEXT, unix_time INTEGER, program_name TEXT, " \
+                   "program_level INTEGER, duration INTEGER, total_distance REAL, total_calories INTEGER, " \
+                   "avg_speed REAL, avg_rpm REAL, avg_heart_rate REAL, avg_watt REAL, max_speed REAL, " \
+                   "max_rpm INTEGER, max_heart_rate INTEGER, max_watt REAL, histograms TEXT, hash INTEGER"
+
+# The workout attributes that the workouts can be ranked by when querying for the workouts with the largest values.
+MAX_VALUE_KEYS = ["duration", "total_distance", "total_calories", "avg_speed", "avg_rpm", "avg_heart_rate",
+                  "avg_watt", "max_speed", "max_rpm", "max_heart_rate", "max_watt"]
+
+
+class WorkoutStore(abc.ABC):
+    """
+    The interface that each storage backend implements. Workouts are identified by their id, which is the unix time
+    the workout was started as a string. Summaries are dictionaries containing the id and the scalar attributes of a
+    workout, while complete workouts also contain the data series of the workout.
+    """
+    @abc.abstractmethod
+    def load_summaries(self):
+        """Returns a list with the summary of each workout, with the most recent workout first."""
+
+    @abc.abstractmethod
+    def list_ids(self):
+        """Returns a list with the id of each workout, with the most recent workout first."""
+
+    @abc.abstractmethod
+    def load_summaries_by_ids(self, workout_ids):
+        """Returns a list with the summary of each workout with one of the given ids, in the order of the ids."""
+
+    @abc.abstractmethod
+    def summary_hashes(self):
+        """
+        Returns a dictionary with a key-value pair for each workout where the key is the workout id and the value is the
+        hash of the summary computed with summary_hash(). The hashes are saved together with the summaries, so the
+        workout history can be compared with saved statistics without loading the summaries.
+        """
+
+    @abc.abstractmethod
+    def max_values(self, key, size, start=None, end=None, program_name=None, program_level=None):
+        """
+        Returns the summaries of the workouts with the largest values for the given key among the workouts matching the
+        given filters, with the best workout first. If a value is tied the most recent workout comes first.
+
+        :param key: The attribute that the workouts are ranked by, which is one of MAX_VALUE_KEYS.
+        :param size: The maximum amount of summaries that are returned.
+        :param start: If given, only workouts started at or after this unix time are included.
+        :param end: If given, only workouts started before this unix time are included.
+        :param program_name: If given, only workouts with this program are included.
+        :param program_level: If given, only workouts with this level are included.
+        """
+
+    @abc.abstractmethod
+    def totals(self, program_name=None, program_level=None):
+        """
+        Returns a dictionary with the total amount of workouts, time in seconds, distance and calories of the workouts
+        matching the given filters.
+
+        :param program_name: If given, only workouts with this program are included.
+        :param program_level: If given, only workouts with this level are included.
+        """
+
+    @abc.abstractmethod
+    def load_workout(self, workout_id):
+        """Returns a dictionary with a key-value pair for each attribute, including the data series, of the workout."""
+
+    @abc.abstractmethod
+    def save_workout(self, workout_id, workout):
+        """Saves the complete workout and returns the summary of the saved workout."""
+
+    def export_json(self, workout_id, path):
+        """Exports the complete workout with the given id to a json file at the given path."""
+        workout_file.export_json(path, self.load_workout(workout_id))
+
+    def close(self):
+        """Releases the resources held by the storage backend. This should be called when the application is closed."""
+
+
+class FileWorkoutStore(WorkoutStore):
+    """
+    Storage backend that saves each workout as a file in the binary columnar format and uses a summary index to list
+    the workouts. Workouts saved as json files by earlier versions of the application can still be loaded. The summary
+    index is checked against the workout files by list_ids(), while the other methods load the index the first time they
+    are used. The workouts are queried with a summary table created from the summary index.
+    """
+    def __init__(self, workout_directory="../data/workouts", index_path="../data/workout_index.json", parallel=False):
+        """
+        Method called when a FileWorkoutStore object is initialized.
+
+        :param workout_directory: The directory containing a file for each workout.
+        :param index_path: The path of the file in which the summary index is saved.
+        :param parallel: If True, workout files that are not indexed yet are parsed in parallel by a process pool.
+        """
+        self.workout_directory = workout_directory
+        self.index = WorkoutIndex(workout_directory, index_path, parallel)
+
+        # The workouts are loaded as memory-mapped workouts, so only a limited amount are kept in memory at a time.
+        self.mapped_workouts = workout_file.MappedWorkoutPool()
+
+        # The summary table used to query the workouts. It is created from the summary index when it is first needed
+        # and discarded whenever the summary index changes. The queries are run in worker threads, so the table is
+        # created and discarded under a lock.
+        self.table = None
+        self.table_lock = threading.Lock()
+
+    def load_summaries(self):
+        return self.index.load_summaries()
+
+    def list_ids(self):
+        with self.table_lock:
+            self.table = None
+
+        return self.index.refresh()
+
+    def load_summaries_by_ids(self, workout_ids):
+        return self.index.load_summaries_by_ids(workout_ids)
+
+    def summary_hashes(self):
+        return self.index.summary_hashes()
+
+    def max_values(self, key, size, start=None, end=None, program_name=None, program_level=None):
+        table = self.__summary_table()
+        rows = table.top(key, size, table.mask(start, end, program_name, program_level))
+
+        return self.load_summaries_by_ids([table.ids[row] for row in rows])
+
+    def totals(self, program_name=None, program_level=None):
+        table = self.__summary_table()
+
+        return table.totals(table.mask(program_name=program_name, program_level=program_level))
+
+    def load_workout(self, workout_id):
+        path = self.index.workout_path(workout_id)
+        if path.endswith(".workout"):
+            return self.mapped_workouts.open(path)
+
+        return self.index.load_workout(workout_id)
+
+    def save_workout(self, workout_id, workout):
+        workout_file.write_workout(f"{self.workout_directory}/{workout_id}.workout", workout)
+        summary = self.index.add(workout_id, workout)
+
+        with self.table_lock:
+            self.table = None
+
+        return summary
+
+    def close(self):
+        self.mapped_workouts.release_all()
+
+    def __summary_table(self):
+        """Returns the summary table of the workout history, creating it from the summary index if necessary."""
+        with self.table_lock:
+            if self.table is None:
+                self.table = SummaryTable(self.index.load_summaries())
+
+            return self.table
+
+
+class SqliteWorkoutStore(WorkoutStore):
+    """
+    Storage backend that saves the workouts in a SQLite database. The summaries are saved in the "workouts" table which
+    is indexed on the start time, the program and level, and each attribute that can be queried for the largest values.
+    The data series are saved separately in the "workout_series" table so queries on the summaries never read the
+    series.
+    """
+    def __init__(self, database_path="../data/workouts.db"):
+        """
+        Method called when a SqliteWorkoutStore object is initialized.
+
+        :param database_path: The path of the SQLite database file.
+        """
+        # The connection is shared with the worker threads, so access to it is serialized with a lock.
+        self.connection = sqlite3.connect(database_path, check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.lock = threading.Lock()
+        self.__create_tables()
+
+    def load_summaries(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT * FROM workouts ORDER BY id DESC").fetchall()
+
+        return [self.__row_to_summary(row) for row in rows]
+
+    def list_ids(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT id FROM workouts ORDER BY id DESC").fetchall()
+
+        return [str(row["id"]) for row in rows]
+
+    def summary_hashes(self):
+        with self.lock:
+            rows = self.connection.execute("SELECT id, hash FROM workouts").fetchall()
+
+        return {str(row["id"]): row["hash"] for row in rows}
+
+    def load_summaries_by_ids(self, workout_ids):
+        with self.lock:
+            rows = self.connection.execute(f"SELECT * FROM workouts WHERE id IN ({', '.join('?' * len(workout_ids))})",
+                                           [int(workout_id) for workout_id in workout_ids]).fetchall()
+
+        summaries = {str(row["id"]): self.__row_to_summary(row) for row in rows}
+
+        return [summaries[workout_id] for workout_id in workout_ids]
+
+    def max_values(self, key, size, start=None, end=None, program_name=None, program_level=None):
+        if key not in MAX_VALUE_KEYS:
+            raise ValueError(f"Cannot query the largest values of \"{key}\".")
+
+        where, parameters = self.__filters(start, end, program_name, program_level)
+        with self.lock:
+            rows = self.connection.execute(f"SELECT * FROM workouts {where} ORDER BY {key} DESC, id DESC LIMIT ?",
+                                           parameters + [size]).fetchall()
+
+        return [self.__row_to_summary(row) for row in rows]
+
+    def totals(self, program_name=None, program_level=None):
+        where, parameters = self.__filters(program_name=program_name, program_level=program_level)
+        with self.lock:
+            row = self.connection.execute(f"SELECT COUNT(*), SUM(duration), SUM(total_distance), SUM(total_calories) "
+                                          f"FROM workouts {where}", parameters).fetchone()
+
+        return {"workouts": row[0], "time": row[1] or 0, "distance": row[2] or 0, "calories": row[3] or 0}
+
+    def load_workout(self, workout_id):
+        with self.lock:
+            summary_row = self.connection.execute("SELECT * FROM workouts WHERE id = ?", (int(workout_id),)).fetchone()
+            series_row = self.connection.execute("SELECT series FROM workout_series WHERE workout_id = ?",
+                                                 (int(workout_id),)).fetchone()
+
+        workout = self.__row_to_summary(summary_row)
+        workout.update(workout_file.decode_workout(series_row["series"]))
+
+        return workout
+
+    def save_workout(self, workout_id, workout):
+        # The histograms are saved as json.
+        summary = [json.dumps(workout[key]) if key == "histograms" else workout[key] for key in SUMMARY_KEYS]
+        series = workout_file.encode_workout({key: workout[key] for key in SERIES_KEYS})
+
+        with self.lock, self.connection:
+            self.connection.execute(f"INSERT OR REPLACE INTO workouts (id, {', '.join(SUMMARY_KEYS)}) "
+                                    f"VALUES (?, {', '.join('?' * len(SUMMARY_KEYS))})", [int(workout_id)] + summary)
+            self.connection.execute("INSERT OR REPLACE INTO workout_series (workout_id, series) VALUES (?, ?)",
+                                    (int(workout_id), series))
+            row = self.connection.execute("SELECT * FROM workouts WHERE id = ?", (int(workout_id),)).fetchone()
+
+            # The hash is computed from the saved row, so it matches the summaries loaded from the database.
+            summary = self.__row_to_summary(row)
+            self.connection.execute("UPDATE workouts SET hash = ? WHERE id = ?",
+                                    (summary_hash(summary), int(workout_id)))
+
+        return summary
+
+    def contains(self, workout_id):
+        """Returns True if the workout with the given id is saved in the database."""
+        with self.lock:
+            row = self.connection.execute("SELECT 1 FROM workouts WHERE id = ?", (int(workout_id),)).fetchone()
+
+        return row is not None
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+    def __create_tables(self):
+        """Creates the tables and indexes of the database if they do not already exist."""
+        with self.connection:
+            self.connection.execute(f"CREATE TABLE IF NOT EXISTS workouts ({WORKOUTS_COLUMNS})")
+            self.connection.execute("CREATE TABLE IF NOT EXISTS workout_series (workout_id INTEGER PRIMARY KEY "
+                                    "REFERENCES workouts(id) ON DELETE CASCADE, series BLOB)")
+
+            self.connection.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+            # The id is the start time of the workout, so the primary key already serves as the date index.
+            self.connection.execute("CREATE INDEX IF NOT EXISTS workouts_program ON workouts (program_name, "
+                                    "program_level)")
+            for key in MAX_VALUE_KEYS:
+                self.connection.execute(f"CREATE INDEX IF NOT EXISTS workouts_{key} ON workouts ({key}, id)")
+
+    @staticmethod
+    def __filters(start=None, end=None, program_name=None, program_level=None):
+        """
+        Helper method used to create the WHERE clause and its parameters that select the workouts matching the given
+        filters.
+
+        :return: A tuple with the format (WHERE clause, list of parameters). The clause is empty if no filter is given.
+        """
+        conditions = []
+        parameters = []
+
+        if start is not None:
+            conditions.append("id >= ?")
+            parameters.append(start)
+        if end is not None:
+            conditions.append("id < ?")
+            parameters.append(end)
+        if program_name is not None:
+            conditions.append("program_name = ?")
+            parameters.append(program_name)
+        if program_level is not None:
+            conditions.append("program_level = ?")
+            parameters.append(program_level)
+
+        return (f"WHERE {' AND '.join(conditions)}" if conditions else ""), parameters
+
+    @staticmethod
+    def __row_to_summary(row):
+        """Converts a row from the "workouts" table into a summary dictionary."""
+        summary = {key: row[key] for key in SUMMARY_KEYS}
+        summary["histograms"] = json.loads(summary["histograms"])
+        summary["id"] = str(row["id"])
+
+        return summary
+
+
+def migrate_json_to_sqlite(workout_directory="../data/workouts", database_path="../data/workouts.db", parallel=False):
+    """
+    Copies every workout saved as a file in the workout directory into the SQLite database. Workouts that are already
+    in the database are skipped, meaning that the migration can safely be run again if it was interrupted.
+
+    :param workout_directory: The directory containing a file for each workout.
+    :param database_path: The path of the SQLite database file.
+    :param parallel: If True, workout files that are not indexed yet are parsed in parallel by a process pool.
+    :return: The amount of workouts that were copied into the database.
+    """
+    file_store = FileWorkoutStore(workout_directory, f"{os.path.dirname(database_path)}/workout_index.json", parallel)
+    sqlite_store = SqliteWorkoutStore(database_path)
+
+    migrated = 0
+    for summary in file_store.load_summaries():
+        if not sqlite_store.contains(summary["id"]):
+            sqlite_store.save_workout(summary["id"], file_store.load_workout(summary["id"]))
+            migrated += 1
+
+    return migrated
+
+
+def create_store(backend, parallel=False):
+    """
+    Creates the storage backend with the given name. If the SQLite backend is chosen and the database does not exist
+    yet, the existing workout files are migrated into the new database.
+
+    :param backend: The name of the storage backend, either "files" or "sqlite".
+    :param parallel: If True, workout files are parsed in parallel when the workout history is loaded from files.
+    :return: An instance of the chosen storage backend.
+    """
+    if backend == "sqlite":
+        if not os.path.exists("../data/workouts.db"):
+            migrate_json_to_sqlite(parallel=parallel)
+
+        return SqliteWorkoutStore()
+
+    return FileWorkoutStore(parallel=parallel)
+
@@ -8,6 +8,7 @@ from PyQt5.QtCore import QThreadPool
 from exercise_bike_logger import bluetooth_session
 from exercise_bike_logger.worker import Worker
 from exercise_bike_logger.settings import Settings
+from exercise_bike_logger.workout_file import seconds_to_timestamp
 from exercise_bike_logger.workout_session import WorkoutSession
 
 
@@ -68,12 +69,12 @@ class WorkoutWindow(QtWidgets.QMainWindow):
         """Stopping the workout prematurely by setting the internal stop flag to True."""
         self.session.stop_flag = True
 
-    def update_live_page(self, timestamp, speed, rpm, distance, calories, heart_rate, watt):
+    def update_live_page(self, seconds, speed, rpm, distance, calories, heart_rate, watt):
         """
         Updating the display widgets on the live workout page with the newest data every second. This method is called
         every time we process a new data response from the exercise bike to ensure the newest data is displayed.
 
-        :param timestamp: The current time in the format HH:MM:SS.
+        :param seconds: The elapsed time of the workout in seconds.
         :param speed: The current speed in km/h.
         :param rpm: The current RPM.
         :param distance: The current distance in km.
@@ -81,7 +82,7 @@ class WorkoutWindow(QtWidgets.QMainWindow):
         :param heart_rate: The current heart rate.
         :param watt: The current power in watt.
         """
-        self.timeLabel.setText(timestamp)
+        self.timeLabel.setText(seconds_to_timestamp(seconds))
         self.speedNumber.display(speed)
         self.rpmNumber.display(rpm)
         self.distanceNumber.display(distance)
@@ -89,8 +90,8 @@ class WorkoutWindow(QtWidgets.QMainWindow):
         self.heartRateNumber.display(heart_rate)
         self.wattNumber.display(watt)
 
-        # Extracting the minutes from the timestamp and using it to plot the live progression of the program.
-        self.update_highlight_point(int(timestamp[3:-3]))
+        # Using the elapsed minutes to plot the live progression of the program.
+        self.update_highlight_point(seconds // 60)
 
     def update_highlight_point(self, current_minute):
         """